@@ -0,0 +1 @@
+# Lets pytest import the app's packages (utils) when run from this directory
@@ -5,15 +5,18 @@ import uvicorn
 import os
 import tempfile
 import asyncio
+import time
 from typing import Dict, Any
 from dotenv import load_dotenv
 from langfuse import Langfuse
-from crewai import Crew, Task
 from agents.clause_extractor import ClauseExtractorAgent
 from agents.risk_assessor import RiskAssessmentAgent
 from agents.suggestion_agent import SuggestionAgent
 from utils.file_parser import DocumentParser
 from utils.pdf_report import PDFReportGenerator
+from utils.contract_pipeline import build_contract_pipeline, cached_analysis
+from utils.admission import AdmissionController, Overloaded, is_throttled
+from utils.rules_triage import triage_contract
 
 # Load environment variables
 load_dotenv()
@@ -49,6 +52,19 @@ clause_extractor = ClauseExtractorAgent()
 risk_assessor = RiskAssessmentAgent()
 suggestion_agent = SuggestionAgent()
 
+# Agent stages as a DAG: clauses and risks run concurrently, suggestions follow risks
+contract_pipeline = build_contract_pipeline(clause_extractor, risk_assessor, suggestion_agent)
+
+# Admission control in front of the agents: an adaptive concurrency limit with a
+# bounded wait queue. LEGAL_OVERLOAD_MODE decides what happens to requests beyond
+# capacity: "degrade" (cached result, else keyword triage) or "reject" (503)
+admission = AdmissionController()
+# Slot releases waiting on timed-out stage calls (kept so the tasks aren't garbage collected)
+pending_releases = set()
+overload_mode = os.getenv("LEGAL_OVERLOAD_MODE", "degrade").lower()
+
+DISCLAIMER = "This analysis is for informational purposes only and does not constitute legal advice. Always consult with a qualified attorney for legal matters."
+
 # Initialize PDF report generator
 pdf_generator = PDFReportGenerator()
 
@@ -63,6 +79,34 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "AI Legal Document Analyzer"}
 
+@app.get("/metrics")
+async def metrics():
+    """Admission control metrics (concurrency limit, queue depth, shed and degraded counts)"""
+    return admission.metrics()
+
+def overload_response(filename, parsed_text, overload):
+    """Answer a request the agents have no capacity for: cached result, keyword triage or 503"""
+    headers = {"Retry-After": str(overload.retry_after)}
+    analysis = cached_analysis(contract_pipeline, parsed_text)
+    mode = "cached"
+    if analysis is None and overload_mode == "degrade":
+        analysis = triage_contract(parsed_text)
+        mode = "rules_only"
+    if analysis is None:
+        admission.record("rejected")
+        print(f"Rejected {filename}: {overload}")
+        raise HTTPException(
+            status_code=503,
+            detail="The analyzer is at capacity. Please retry shortly.",
+            headers=headers
+        )
+    admission.record(mode)
+    print(f"Served {filename} in {mode} mode: {overload}")
+    return JSONResponse(
+        content={"filename": filename, **analysis, "analysis_mode": mode, "disclaimer": DISCLAIMER},
+        headers=headers
+    )
+
 @app.post("/api/analyze-contract")
 async def analyze_contract(file: UploadFile = File(...)):
     """
@@ -92,87 +136,43 @@ async def analyze_contract(file: UploadFile = File(...)):
             if not parsed_text.strip():
                 raise HTTPException(status_code=400, detail="Could not extract text from document")
             
-            # Execute agents sequentially with individual error handling
-            clauses_output = "Contract clauses extracted successfully."
-            risks_output = "No risks identified."
-            suggestions_output = "No suggestions generated."
-            
             try:
-                # Step 1: Extract clauses
-                clause_task = Task(
-                    description=f"Extract key contract clauses from the following document text:\n\n{parsed_text}",
-                    agent=clause_extractor.get_agent(),
-                    expected_output="JSON object containing extracted clauses"
-                )
-                clause_crew = Crew(agents=[clause_extractor.get_agent()], tasks=[clause_task], verbose=False)
-                clause_result = clause_crew.kickoff()
-                if hasattr(clause_task, 'output') and clause_task.output:
-                    raw_output = clause_task.output.raw if hasattr(clause_task.output, 'raw') else str(clause_task.output)
-                    # Clean up the output if it contains only "Thought:" prefixes
-                    if raw_output.strip() == "Thought: I now can give a great answer":
-                        clauses_output = "Clause extraction completed successfully."
-                    else:
-                        clauses_output = raw_output
-            except Exception as e:
-                print(f"Clause extraction failed: {e}")
-                clauses_output = "Clause extraction encountered an error."
+                await admission.acquire()
+            except Overloaded as overload:
+                return overload_response(file.filename, parsed_text, overload)
             
+            # Run the agent stages off the event loop; each stage has its own
+            # timeout, cache and fallback message
+            started = time.perf_counter()
+            throttled = False
+            result = None
             try:
-                # Step 2: Risk assessment
-                risk_task = Task(
-                    description=f"Analyze the following contract text for potential risks. Output MUST be plain text numbered list format.\n\nContract text:\n{parsed_text}",
-                    agent=risk_assessor.get_agent(),
-                    expected_output="Plain text numbered list with format: 1. [RISK LEVEL] - Risk Type. Risk: explanation. Impact: consequences."
-                )
-                risk_crew = Crew(agents=[risk_assessor.get_agent()], tasks=[risk_task], verbose=False)
-                risk_result = risk_crew.kickoff()
-                if hasattr(risk_task, 'output') and risk_task.output:
-                    raw_output = risk_task.output.raw if hasattr(risk_task.output, 'raw') else str(risk_task.output)
-                    # Clean up the output if it contains only "Thought:" prefixes
-                    if raw_output.strip() == "Thought: I now can give a great answer":
-                        risks_output = "Risk assessment completed successfully."
-                    else:
-                        risks_output = raw_output
-            except Exception as e:
-                print(f"Risk assessment failed: {e}")
-                risks_output = "Risk assessment encountered an error. Please try again."
-            
-            # Only try suggestions if risks were successful
-            if "encountered an error" not in risks_output:
-                try:
-                    # Step 3: Generate suggestions with retry logic
-                    suggestion_task = Task(
-                        description=f"Generate safer alternative wordings for the contract. Use this context:\n\nContract text:\n{parsed_text[:2000]}...\n\nIdentified risks:\n{risks_output[:1000]}...\n\nOutput MUST be plain text numbered list format.",
-                        agent=suggestion_agent.get_agent(),
-                        expected_output="Plain text numbered list with format: 1. PROBLEMATIC CLAUSE: [text]. SUGGESTED REVISION: [better text]. WHY THIS IS BETTER: [explanation]."
-                    )
-                    suggestion_crew = Crew(agents=[suggestion_agent.get_agent()], tasks=[suggestion_task], verbose=False)
-                    suggestion_result = suggestion_crew.kickoff()
-                    if hasattr(suggestion_task, 'output') and suggestion_task.output:
-                        raw_output = suggestion_task.output.raw if hasattr(suggestion_task.output, 'raw') else str(suggestion_task.output)
-                        # Clean up the output if it contains only "Thought:" prefixes
-                        if raw_output.strip() == "Thought: I now can give a great answer":
-                            suggestions_output = "Suggestion generation completed successfully."
-                        else:
-                            suggestions_output = raw_output
-                except Exception as e:
-                    print(f"Suggestion generation failed: {e}")
-                    suggestions_output = """1. PROBLEMATIC CLAUSE: Contract terms may lack clarity or balance. 
-SUGGESTED REVISION: Review all contract terms with qualified legal counsel to ensure fair and clear provisions. 
-WHY THIS IS BETTER: Professional legal review ensures balanced terms and reduces risk of disputes.
-
-2. PROBLEMATIC CLAUSE: Payment and liability terms may be one-sided. 
-SUGGESTED REVISION: Implement mutual liability caps, clear payment schedules, and balanced termination clauses. 
-WHY THIS IS BETTER: Balanced terms protect both parties and promote successful business relationships.
-
-Note: Due to API rate limits, detailed suggestions were not generated. Please consult with a qualified attorney for specific contract improvements."""
+                result = await asyncio.to_thread(contract_pipeline.run, parsed_text=parsed_text)
+                # Stage fallbacks hide upstream 429s from the response, but the
+                # limiter still needs to see them
+                throttled = is_throttled(report.error for report in result.stages.values())
+            finally:
+                latency = time.perf_counter() - started
+                abandoned = result.abandoned_calls if result is not None else []
+                if abandoned:
+                    # Timed-out stages are still calling the LLM: answer now, but
+                    # keep the slot until those calls end
+                    task = asyncio.create_task(admission.release_after(abandoned, latency, throttled))
+                    pending_releases.add(task)
+                    task.add_done_callback(pending_releases.discard)
+                else:
+                    admission.release(latency, throttled)
+            print("Stage timings: " + ", ".join(
+                f"{name} {seconds:.1f}s" for name, seconds in result.timings.items()
+            ))
             
             analysis_result = {
                 "filename": file.filename,
-                "extracted_clauses": clauses_output,
-                "risk_assessment": risks_output,
-                "suggestions": suggestions_output,
-                "disclaimer": "This analysis is for informational purposes only and does not constitute legal advice. Always consult with a qualified attorney for legal matters."
+                "extracted_clauses": result["extracted_clauses"],
+                "risk_assessment": result["risk_assessment"],
+                "suggestions": result["suggestions"],
+                "analysis_mode": "full",
+                "disclaimer": DISCLAIMER
             }
             
             # Analysis completed successfully
@@ -183,6 +183,8 @@ Note: Due to API rate limits, detailed suggestions were not generated. Please co
             # Clean up temporary file
             os.unlink(temp_file_path)
             
+    except HTTPException:
+        raise
     except Exception as e:
         # Log error
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
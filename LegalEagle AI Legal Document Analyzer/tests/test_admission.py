@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import pytest
+from utils.admission import AdmissionController, Overloaded, is_throttled
+
+
+def controller(**overrides):
+    settings = dict(min_limit=1, max_limit=4, initial_limit=1, max_queue=1, max_wait=0.2, target_latency=10)
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+def test_full_queue_is_shed_with_a_retry_hint():
+    async def scenario():
+        admission = controller()
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as overload:
+            await admission.acquire()
+        assert overload.value.retry_after >= 1
+        admission.release(1.0)
+        await waiter
+        return admission.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["shed_queue_full"] == 1
+    assert metrics["in_flight"] == 1
+
+
+def test_queue_wait_times_out():
+    async def scenario():
+        admission = controller()
+        await admission.acquire()
+        with pytest.raises(Overloaded):
+            await admission.acquire()
+        return admission.metrics()
+
+    assert asyncio.run(scenario())["shed_queue_timeout"] == 1
+
+
+def test_throttling_cuts_the_limit():
+    admission = controller(initial_limit=4)
+    admission.in_flight = 1
+    admission.release(1.0, throttled=True)
+    assert admission.limit < 4
+    assert is_throttled(["Error code: 429 - Too Many Requests"])
+    assert not is_throttled([None, "timed out after 120s"])
+
+
+def test_slot_is_held_until_abandoned_calls_finish():
+    async def scenario():
+        admission = controller(max_wait=5)
+        finish = threading.Event()
+        abandoned = threading.Thread(target=finish.wait, daemon=True)
+        abandoned.start()
+
+        await admission.acquire()
+        release = asyncio.create_task(admission.release_after([abandoned], 1.0))
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0.1)
+        held = (waiter.done(), admission.in_flight, admission.metrics()["abandoned_calls"])
+
+        finish.set()
+        await release
+        await asyncio.wait_for(waiter, 1)
+        return held, admission.metrics()
+
+    held, metrics = asyncio.run(scenario())
+    assert held == (False, 1, 1)
+    assert metrics["abandoned_calls"] == 0
+    assert metrics["held_for_abandoned"] == 1
+
+
+def test_slot_granted_as_the_wait_times_out_is_kept(monkeypatch):
+    async def scenario():
+        admission = controller(max_wait=5)
+        await admission.acquire()
+
+        async def wake_then_time_out(waiter, timeout):
+            # The holder finishes in the same loop iteration the timeout fires
+            admission.release(1.0)
+            assert waiter.done()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", wake_then_time_out)
+        await admission.acquire()
+        monkeypatch.undo()
+        granted = admission.in_flight
+        admission.release(1.0)
+        return granted, admission.metrics()
+
+    granted, metrics = asyncio.run(scenario())
+    assert granted == 1
+    assert metrics["in_flight"] == 0
+    assert metrics["shed_queue_timeout"] == 0
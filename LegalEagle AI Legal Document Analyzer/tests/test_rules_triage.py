@@ -0,0 +1,38 @@
+from utils.rules_triage import triage_contract
+
+
+def risk_names(text):
+    return [line.split("] - ", 1)[1].split(".", 1)[0]
+            for line in triage_contract(text)["risk_assessment"].splitlines() if "] - " in line]
+
+
+def test_exclusive_jurisdiction_is_only_a_governing_law_finding():
+    text = "The courts of England shall have exclusive jurisdiction over any dispute."
+    assert risk_names(text) == ["Governing Law"]
+
+
+def test_exclusive_dealing_is_flagged():
+    assert "Non-Compete / Exclusivity" in risk_names("Supplier is appointed as the exclusive distributor in France.")
+    assert "Non-Compete / Exclusivity" in risk_names("The Customer grants the Agency exclusivity for 3 years.")
+    assert "Non-Compete / Exclusivity" not in risk_names("Licensor grants a non-exclusive licence on a non-exclusive basis.")
+    assert "Non-Compete / Exclusivity" not in risk_names("Prices are exclusive of VAT.")
+
+
+def test_only_indemnity_obligations_are_flagged():
+    assert "Broad Indemnification" in risk_names("The Supplier shall indemnify the Customer against all losses.")
+    assert "Broad Indemnification" in risk_names("Contractor agrees to defend, indemnify and hold harmless the Client.")
+    assert "Broad Indemnification" in risk_names("Vendor will hold the Customer harmless from third-party claims.")
+    assert "Broad Indemnification" not in risk_names("No indemnity is given under this agreement.")
+    assert "Broad Indemnification" not in risk_names("The indemnification provisions in Schedule 2 are deleted.")
+
+
+def test_output_keeps_the_agent_formats():
+    analysis = triage_contract("This Agreement shall automatically renew for successive one-year terms.")
+    assert analysis["extracted_clauses"].startswith("1. Automatic Renewal: ")
+    assert analysis["risk_assessment"].startswith("1. [MEDIUM] - Automatic Renewal. Risk: ")
+    assert "PROBLEMATIC CLAUSE:" in analysis["suggestions"]
+
+
+def test_clean_contract_has_no_findings():
+    analysis = triage_contract("The parties will meet monthly to review progress.")
+    assert analysis["suggestions"] == "No suggestions generated."
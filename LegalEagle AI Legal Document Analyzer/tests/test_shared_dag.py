@@ -0,0 +1,13 @@
+import os
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(APP_DIR)
+
+
+def test_dag_matches_the_symptom_recognizer_copy():
+    other = os.path.join(REPO_DIR, "Symptom Recognizer", "utils", "dag.py")
+    if not os.path.exists(other):
+        pytest.skip("Symptom Recognizer is not checked out next to this app")
+    with open(os.path.join(APP_DIR, "utils", "dag.py"), "rb") as f, open(other, "rb") as g:
+        assert f.read() == g.read(), "utils/dag.py differs from the Symptom Recognizer copy"
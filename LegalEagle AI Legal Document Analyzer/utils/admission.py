@@ -0,0 +1,172 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+
+# Substrings of stage errors that mean the upstream LLM throttled us
+THROTTLE_MARKERS = ["429", "rate limit", "rate_limit", "too many requests"]
+
+
+class Overloaded(Exception):
+    """Raised when a request can't be admitted; carries a Retry-After hint in seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Server overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_throttled(errors):
+    """True when any stage error looks like an upstream 429 / rate limit"""
+    return any(marker in str(error).lower() for error in errors if error for marker in THROTTLE_MARKERS)
+
+
+def _join_all(threads):
+    for thread in threads:
+        thread.join()
+
+
+class AdmissionController:
+    """Adaptive concurrency limit with a bounded wait queue (for one asyncio event loop)
+
+    The limit follows AIMD: it grows by roughly one slot per limit's worth of
+    healthy completions and is cut multiplicatively when the upstream throttles
+    (429) or the smoothed latency rises above the target. Requests beyond the
+    limit wait in a bounded FIFO queue; when the queue is full or the wait
+    exceeds max_wait, acquire() raises Overloaded immediately instead of
+    letting work pile up on the LLM.
+    """
+
+    def __init__(self, min_limit=None, max_limit=None, initial_limit=None, max_queue=None,
+                 max_wait=None, target_latency=None, decrease_factor=0.7, smoothing=0.2):
+        self.min_limit = int(min_limit or os.environ.get("LEGAL_MIN_CONCURRENCY", 1))
+        self.max_limit = int(max_limit or os.environ.get("LEGAL_MAX_CONCURRENCY", 8))
+        self.limit = float(initial_limit or os.environ.get("LEGAL_INITIAL_CONCURRENCY", 2))
+        self.max_queue = int(max_queue if max_queue is not None else os.environ.get("LEGAL_MAX_QUEUE", 8))
+        self.max_wait = float(max_wait or os.environ.get("LEGAL_MAX_QUEUE_WAIT", 30))
+        self.target_latency = float(target_latency or os.environ.get("LEGAL_TARGET_LATENCY", 60))
+        self.decrease_factor = decrease_factor
+        self.smoothing = smoothing
+        self.limit = min(max(self.limit, self.min_limit), self.max_limit)
+
+        self.in_flight = 0
+        # Timed-out stage calls still running for requests whose slots are held
+        self.abandoned_calls = 0
+        self.latency_ewma = None
+        self._waiters = deque()
+        self._last_decrease = 0.0
+        self.counts = {
+            "admitted": 0, "queued": 0, "completed": 0, "throttled": 0,
+            "shed_queue_full": 0, "shed_queue_timeout": 0,
+            "served_cached": 0, "served_rules_only": 0, "rejected": 0, "held_for_abandoned": 0,
+            "limit_increases": 0, "limit_decreases": 0,
+        }
+
+    def retry_after(self):
+        """Seconds until a retry is likely to be admitted, from queue depth and latency"""
+        latency = self.latency_ewma or self.target_latency / 2
+        estimate = latency * (len(self._waiters) + 1) / max(1.0, self.limit)
+        return int(min(120, max(1, math.ceil(estimate))))
+
+    def _has_capacity(self):
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self):
+        """Wait for a slot; raises Overloaded when the queue is full or the wait times out"""
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.counts["admitted"] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.counts["shed_queue_full"] += 1
+            raise Overloaded("queue full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.counts["queued"] += 1
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # _wake() granted the slot just as the wait timed out; take it
+                self.counts["admitted"] += 1
+                return
+            self.counts["shed_queue_timeout"] += 1
+            raise Overloaded("queue wait timed out", self.retry_after())
+        except asyncio.CancelledError:
+            # Client went away; hand the slot on if we were already granted one
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        self.counts["admitted"] += 1
+
+    def release(self, latency_seconds, throttled=False):
+        """Free a slot and adapt the limit from the request's latency and throttling"""
+        self.in_flight -= 1
+        self.counts["completed"] += 1
+        if self.latency_ewma is None:
+            self.latency_ewma = latency_seconds
+        else:
+            self.latency_ewma += self.smoothing * (latency_seconds - self.latency_ewma)
+
+        now = time.monotonic()
+        if throttled:
+            self.counts["throttled"] += 1
+        if throttled or self.latency_ewma > self.target_latency:
+            # At most one cut per smoothed latency period, so one burst of slow
+            # responses doesn't collapse the limit to the minimum
+            if now - self._last_decrease >= min(self.latency_ewma, self.target_latency):
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._last_decrease = now
+                self.counts["limit_decreases"] += 1
+        elif self.limit < self.max_limit and (self._waiters or self.in_flight + 1 >= int(self.limit)):
+            # Only grow while the limit is actually the bottleneck
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.counts["limit_increases"] += 1
+        self._wake()
+
+    async def release_after(self, threads, latency_seconds, throttled=False):
+        """Release a slot once the given threads (abandoned timed-out stage calls) have finished
+
+        A timed-out call keeps using the LLM, so the request's slot stays taken
+        until it ends instead of admitting new work on top of it.
+        """
+        threads = [thread for thread in threads if thread.is_alive()]
+        if threads:
+            self.abandoned_calls += len(threads)
+            self.counts["held_for_abandoned"] += 1
+            try:
+                await asyncio.to_thread(_join_all, threads)
+            finally:
+                self.abandoned_calls -= len(threads)
+        self.release(latency_seconds, throttled)
+
+    def _wake(self):
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def record(self, outcome):
+        """Count how an over-capacity request was answered ("cached", "rules_only" or "rejected")"""
+        self.counts["rejected" if outcome == "rejected" else f"served_{outcome}"] += 1
+
+    def metrics(self):
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "abandoned_calls": self.abandoned_calls,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "latency_ewma_seconds": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "target_latency_seconds": self.target_latency,
+            "shed_total": self.counts["shed_queue_full"] + self.counts["shed_queue_timeout"],
+            **self.counts,
+        }
@@ -0,0 +1,116 @@
+import os
+from crewai import Crew, Task
+from utils.dag import Stage, Pipeline, MemoryCache, text_key
+
+# Output some agents return when they stop after their first reasoning step
+EMPTY_AGENT_OUTPUT = "Thought: I now can give a great answer"
+
+DEFAULT_STAGE_TIMEOUT = 120.0
+
+FALLBACK_SUGGESTIONS = """1. PROBLEMATIC CLAUSE: Contract terms may lack clarity or balance. 
+SUGGESTED REVISION: Review all contract terms with qualified legal counsel to ensure fair and clear provisions. 
+WHY THIS IS BETTER: Professional legal review ensures balanced terms and reduces risk of disputes.
+
+2. PROBLEMATIC CLAUSE: Payment and liability terms may be one-sided. 
+SUGGESTED REVISION: Implement mutual liability caps, clear payment schedules, and balanced termination clauses. 
+WHY THIS IS BETTER: Balanced terms protect both parties and promote successful business relationships.
+
+Note: Due to API rate limits, detailed suggestions were not generated. Please consult with a qualified attorney for specific contract improvements."""
+
+
+def run_agent_task(agent_wrapper, description, expected_output, completed_message, no_output_message):
+    """Run one agent on one task and return its cleaned-up raw output"""
+    agent = agent_wrapper.get_agent()
+    task = Task(description=description, agent=agent, expected_output=expected_output)
+    Crew(agents=[agent], tasks=[task], verbose=False).kickoff()
+    if not getattr(task, "output", None):
+        return no_output_message
+    raw_output = task.output.raw if hasattr(task.output, "raw") else str(task.output)
+    # Clean up the output if it contains only "Thought:" prefixes
+    if raw_output.strip() == EMPTY_AGENT_OUTPUT:
+        return completed_message
+    return raw_output
+
+
+def build_contract_pipeline(clause_extractor, risk_assessor, suggestion_agent, cache=None):
+    """Declare the contract analysis DAG
+
+    Clause extraction and risk assessment only need the contract text, so
+    they run concurrently; suggestions wait for the risks. A failed stage
+    falls back to the same messages the API returned before.
+    """
+    timeout = float(os.environ.get("LEGAL_STAGE_TIMEOUT", DEFAULT_STAGE_TIMEOUT))
+
+    def extract_clauses(parsed_text):
+        return run_agent_task(
+            clause_extractor,
+            f"Extract key contract clauses from the following document text:\n\n{parsed_text}",
+            "JSON object containing extracted clauses",
+            "Clause extraction completed successfully.",
+            "Contract clauses extracted successfully.",
+        )
+
+    def assess_risks(parsed_text):
+        return run_agent_task(
+            risk_assessor,
+            f"Analyze the following contract text for potential risks. Output MUST be plain text numbered list format.\n\nContract text:\n{parsed_text}",
+            "Plain text numbered list with format: 1. [RISK LEVEL] - Risk Type. Risk: explanation. Impact: consequences.",
+            "Risk assessment completed successfully.",
+            "No risks identified.",
+        )
+
+    def suggest_revisions(parsed_text, risk_assessment):
+        return run_agent_task(
+            suggestion_agent,
+            f"Generate safer alternative wordings for the contract. Use this context:\n\nContract text:\n{parsed_text[:2000]}...\n\nIdentified risks:\n{risk_assessment[:1000]}...\n\nOutput MUST be plain text numbered list format.",
+            "Plain text numbered list with format: 1. PROBLEMATIC CLAUSE: [text]. SUGGESTED REVISION: [better text]. WHY THIS IS BETTER: [explanation].",
+            "Suggestion generation completed successfully.",
+            "No suggestions generated.",
+        )
+
+    def fallback_to(value, label):
+        def handler(error, **inputs):
+            print(f"{label} failed: {error}")
+            return value
+        return handler
+
+    stages = [
+        Stage(
+            "clauses", extract_clauses, inputs={"parsed_text": str},
+            output="extracted_clauses", output_type=str, timeout=timeout,
+            cache_key=lambda parsed_text: text_key(parsed_text),
+            fallback=fallback_to("Clause extraction encountered an error.", "Clause extraction"),
+        ),
+        Stage(
+            "risks", assess_risks, inputs={"parsed_text": str},
+            output="risk_assessment", output_type=str, timeout=timeout,
+            cache_key=lambda parsed_text: text_key(parsed_text),
+            fallback=fallback_to("Risk assessment encountered an error. Please try again.", "Risk assessment"),
+        ),
+        Stage(
+            "suggestions", suggest_revisions, inputs={"parsed_text": str, "risk_assessment": str},
+            output_type=str, timeout=timeout, retries=1,
+            cache_key=lambda parsed_text, risk_assessment: text_key(parsed_text, risk_assessment),
+            fallback=fallback_to(FALLBACK_SUGGESTIONS, "Suggestion generation"),
+            # Only try suggestions if risks were successful
+            run_if=lambda parsed_text, risk_assessment: "encountered an error" not in risk_assessment,
+            skip_value="No suggestions generated.",
+        ),
+    ]
+    return Pipeline(stages, cache=cache if cache is not None else MemoryCache(), max_workers=3, log=print)
+
+
+def cached_analysis(pipeline, parsed_text):
+    """A full earlier analysis of the same text from the pipeline's stage cache, or None"""
+    if pipeline.cache is None:
+        return None
+    extracted_clauses = pipeline.cache.get("clauses", text_key(parsed_text))
+    risk_assessment = pipeline.cache.get("risks", text_key(parsed_text))
+    if extracted_clauses is None or risk_assessment is None:
+        return None
+    suggestions = pipeline.cache.get("suggestions", text_key(parsed_text, risk_assessment))
+    return {
+        "extracted_clauses": extracted_clauses,
+        "risk_assessment": risk_assessment,
+        "suggestions": suggestions if suggestions is not None else "No suggestions generated.",
+    }
@@ -0,0 +1,115 @@
+import re
+
+# (risk level, risk type, pattern, explanation, impact, suggested revision)
+RULES = [
+    ("HIGH", "Unlimited Liability",
+     r"\bunlimited liability\b|\bliab\w* (?:shall )?not be (?:limited|capped)\b|\bwithout limitation of liability\b",
+     "The contract appears to leave liability uncapped.",
+     "A single claim could exceed the value of the whole agreement.",
+     "Cap each party's aggregate liability at the fees paid in the preceding 12 months, excluding fraud and wilful misconduct."),
+    ("HIGH", "Broad Indemnification",
+     # An obligation to indemnify, not any mention (e.g. "no indemnity is given")
+     r"\b(?:shall|will|must|agrees? to|undertakes? to) (?:defend,? (?:and )?)?indemnif\w*\b"
+     r"|\bhold (?:\w+ ){0,3}harmless\b",
+     "One party may have to cover the other's losses, possibly including third-party claims.",
+     "Indemnities can survive termination and sit outside any liability cap.",
+     "Make indemnities mutual, limit them to claims caused by the indemnifying party, and bring them under the liability cap."),
+    ("HIGH", "Unilateral Amendment",
+     r"\b(?:may|reserves the right to) (?:amend|modify|change|update) (?:this agreement|these terms|the terms)\b",
+     "One party can change the terms without the other's agreement.",
+     "Obligations or prices could change after signing.",
+     "Require any amendment to be in writing and signed by both parties."),
+    ("MEDIUM", "Automatic Renewal",
+     r"\bauto(?:matic(?:ally)?)?[- ]?renew\w*\b|\brenew\w* automatically\b|\bevergreen\b",
+     "The agreement renews unless someone cancels in time.",
+     "Missing the notice window locks the parties into another term.",
+     "Renew only on written confirmation, or require a reminder notice 60 days before the renewal date."),
+    ("MEDIUM", "Termination Without Cause",
+     r"\bterminat\w* (?:this agreement )?(?:at any time|for convenience|without cause)\b",
+     "A party can end the agreement without a reason.",
+     "Work, investment or revenue can be cut off at short notice.",
+     "Allow termination for convenience only with at least 30 days' written notice and payment for work performed."),
+    ("MEDIUM", "Non-Compete / Exclusivity",
+     # Exclusive dealing only: "exclusive jurisdiction" is left to the governing law rule
+     r"\bnon[- ]?compet\w*\b|\bnon[- ]?solicit\w*\b|(?<!non-)(?<!non )\bexclusivity\b"
+     r"|(?<!non-)(?<!non )\bexclusive (?:dealing|supplier|provider|distribut\w*|partner\w*|arrangement|basis)\b",
+     "The contract restricts who a party may work with or compete against.",
+     "Overly broad restrictions limit future business and may be unenforceable.",
+     "Limit restrictions to a defined market, territory and a period of no more than 12 months."),
+    ("MEDIUM", "Intellectual Property Assignment",
+     r"\b(?:assign\w*|transfer\w*) (?:all )?(?:right, title and interest|intellectual property)\b|\bwork made for hire\b",
+     "Ownership of intellectual property may move to the other party.",
+     "Pre-existing know-how or tools could be lost along with the deliverables.",
+     "Assign only deliverables created under this agreement and keep pre-existing IP under a licence."),
+    ("MEDIUM", "Penalties and Late Fees",
+     r"\bliquidated damages\b|\blate (?:fee|charge|payment)\w*\b|\bpenalt\w*\b",
+     "Fixed damages or late charges apply on breach or late payment.",
+     "Charges can accumulate quickly and may be disproportionate.",
+     "Tie damages to a genuine pre-estimate of loss and cap late interest at a statutory rate."),
+    ("LOW", "Dispute Resolution",
+     r"\barbitrat\w*\b|\bwaive\w* (?:any |the )?right to (?:a )?jury\b|\bclass action\b",
+     "Disputes go to arbitration or jury and class rights are waived.",
+     "Remedies and venue options are narrower than in court.",
+     "Agree a neutral venue, shared costs and a carve-out for urgent injunctive relief."),
+    ("LOW", "Governing Law",
+     r"\bgoverned by (?:and construed in accordance with )?the laws? of\b|\bexclusive jurisdiction\b",
+     "The contract picks a governing law or forum.",
+     "Enforcing rights in a distant or unfamiliar jurisdiction is costly.",
+     "Choose the governing law and courts of a party's home jurisdiction or a neutral one."),
+    ("LOW", "Confidentiality Term",
+     r"\bconfidential\w*\b[^.]{0,120}\b(?:perpetu\w*|indefinite\w*|in perpetuity)\b",
+     "Confidentiality obligations appear to have no end date.",
+     "Indefinite obligations are hard to track and comply with.",
+     "Limit confidentiality to a fixed period (e.g. 3-5 years), with trade secrets protected while they remain secret."),
+]
+
+_COMPILED = [(level, name, re.compile(pattern, re.IGNORECASE), explanation, impact, revision)
+             for level, name, pattern, explanation, impact, revision in RULES]
+
+NOTICE = ("Note: The service was at capacity, so this is a quick keyword-based triage rather than a full "
+          "AI review. Please resubmit later for a detailed analysis.")
+
+
+def _excerpt(text, match, width=160):
+    """The sentence-ish window around a match, on one line"""
+    start = max(0, match.start() - width // 2)
+    end = min(len(text), match.end() + width // 2)
+    snippet = " ".join(text[start:end].split())
+    return ("..." if start else "") + snippet + ("..." if end < len(text) else "")
+
+
+def triage_contract(parsed_text):
+    """Keyword-based analysis used when the agents are overloaded
+
+    Returns the same three text fields as the agent pipeline (clauses, risks,
+    suggestions) in the same numbered-list formats, so the UI and the PDF
+    report render it unchanged.
+    """
+    findings = []
+    for level, name, pattern, explanation, impact, revision in _COMPILED:
+        match = pattern.search(parsed_text)
+        if match:
+            findings.append((level, name, _excerpt(parsed_text, match), explanation, impact, revision))
+
+    if not findings:
+        return {
+            "extracted_clauses": "No common risk clauses were detected by keyword triage.",
+            "risk_assessment": "No risks identified by keyword triage.\n\n" + NOTICE,
+            "suggestions": "No suggestions generated.",
+        }
+
+    clauses = "\n".join(f"{i}. {name}: \"{excerpt}\"" for i, (_, name, excerpt, _, _, _) in enumerate(findings, 1))
+    risks = "\n".join(
+        f"{i}. [{level}] - {name}. Risk: {explanation} Impact: {impact}"
+        for i, (level, name, _, explanation, impact, _) in enumerate(findings, 1)
+    )
+    suggestions = "\n\n".join(
+        f"{i}. PROBLEMATIC CLAUSE: \"{excerpt}\" \nSUGGESTED REVISION: {revision} \n"
+        f"WHY THIS IS BETTER: Reduces the {name.lower()} risk. {impact}"
+        for i, (_, name, excerpt, _, impact, revision) in enumerate(findings, 1)
+    )
+    return {
+        "extracted_clauses": clauses,
+        "risk_assessment": risks + "\n\n" + NOTICE,
+        "suggestions": suggestions,
+    }
@@ -0,0 +1 @@
+# Lets pytest import the pitch_evaluator package when run from this directory
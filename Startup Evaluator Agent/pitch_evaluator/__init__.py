@@ -0,0 +1 @@
+"""Importable tools and agents for the Startup Pitch Evaluator notebook."""
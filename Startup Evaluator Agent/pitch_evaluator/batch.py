@@ -0,0 +1,300 @@
+import os
+import csv
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+
+from pitch_evaluator.batch_common import RateLimiter, load_checkpoint, percentile
+from pitch_evaluator.market_search import SearchCache
+from pitch_evaluator.trend_corpus import find_market_trends, get_corpus
+from pitch_evaluator.investor_feedback import investor_feedback_with_sources
+from pitch_evaluator.tracing import span
+
+# Columns accepted as the pitch text in the input CSV
+PITCH_FIELDS = ["pitch", "pitch_text", "description", "text"]
+
+# queue_wait is time spent queued between the stages; rate_wait is time spent
+# waiting on the search and feedback rate limiters
+STAGES = ["search", "feedback", "queue_wait", "rate_wait", "total"]
+
+# Marks the end of the input on a stage queue
+_DONE = object()
+
+
+def read_pitches(input_path):
+    """Yield (pitch_id, pitch, search_query) from a CSV with a pitch column and optional id/query columns"""
+    with open(input_path, "r", encoding="utf-8", newline="") as f:
+        for row_number, row in enumerate(csv.DictReader(f), start=1):
+            row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+            pitch = next((row[field] for field in PITCH_FIELDS if row.get(field)), "")
+            yield row.get("id") or str(row_number), pitch, row.get("query") or pitch
+
+
+def summarize(timings, counts, elapsed, busy):
+    """Build throughput, per-stage latency and stage utilization statistics"""
+    stages = {}
+    for stage in STAGES:
+        values = timings.get(stage, [])
+        if values:
+            stages[stage] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "max": max(values),
+            }
+    finished = counts["completed"] + counts["failed"]
+    return {
+        "completed": counts["completed"],
+        "failed": counts["failed"],
+        "skipped": counts["skipped"],
+        "elapsed_seconds": elapsed,
+        "throughput_per_minute": finished / elapsed * 60 if elapsed else 0.0,
+        # Busy seconds over available worker seconds: which stage is the bottleneck
+        "utilization": {
+            stage: seconds / (elapsed * busy["workers"][stage]) if elapsed else 0.0
+            for stage, seconds in busy["seconds"].items()
+        },
+        "stages": stages,
+    }
+
+
+def print_summary(summary):
+    """Print batch statistics in plain text"""
+    print(f"\n{'='*50}")
+    print("BATCH SUMMARY")
+    print(f"{'='*50}")
+    print(f"Completed: {summary['completed']}  Failed: {summary['failed']}  Skipped: {summary['skipped']}")
+    print(f"Elapsed: {summary['elapsed_seconds']:.1f}s  "
+          f"Throughput: {summary['throughput_per_minute']:.1f} pitches/min")
+    print("Stage utilization: " + ", ".join(
+        f"{stage} {value:.0%}" for stage, value in summary["utilization"].items()
+    ))
+    if "corpus" in summary:
+        corpus = summary["corpus"]
+        print(f"Trend corpus: {corpus['documents']} documents, {corpus['hit_ratio']:.0%} of lookups served "
+              f"locally, {corpus['live_searches']} live searches ({corpus['coalesced_searches']} shared)")
+    print("\nPer-stage latency (seconds):")
+    print(f"{'stage':<12}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}")
+    for stage, stats in summary["stages"].items():
+        print(f"{stage:<12}{stats['count']:>7}{stats['mean']:>9.2f}{stats['p50']:>9.2f}"
+              f"{stats['p95']:>9.2f}{stats['max']:>9.2f}")
+
+
+def run_batch(input_path, output_path, search_concurrency=4, feedback_concurrency=2,
+              search_rate=2.0, feedback_rate=1.0, queue_size=8, max_results=5,
+              checkpoint_path=None, retry_failed=False, search=None, evaluate=None):
+    """Evaluate every pitch in a CSV through a two-stage pipeline and append results to output_path
+
+    Search workers and feedback workers are connected by bounded queues, so
+    market search for later pitches overlaps with feedback for earlier ones
+    while a slow stage pushes back on the faster one. Each stage has its own
+    worker count and rate limit. Finished ids go to a checkpoint file so an
+    interrupted run can be resumed with the same command.
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    done = load_checkpoint(checkpoint_path, retry_failed)
+
+    use_corpus = search is None
+    if use_corpus:
+        cache = SearchCache()
+        search = lambda query: find_market_trends(query, max_results, cache=cache)
+    evaluate = evaluate or investor_feedback_with_sources
+
+    search_limiter = RateLimiter(search_rate, burst=search_concurrency)
+    feedback_limiter = RateLimiter(feedback_rate, burst=feedback_concurrency)
+    search_queue = queue.Queue(maxsize=queue_size)
+    feedback_queue = queue.Queue(maxsize=queue_size)
+
+    lock = threading.Lock()
+    timings = {stage: [] for stage in STAGES}
+    counts = {"completed": 0, "failed": 0, "skipped": 0}
+    busy = {"seconds": {"search": 0.0, "feedback": 0.0},
+            "workers": {"search": search_concurrency, "feedback": feedback_concurrency}}
+    searchers_left = [search_concurrency]
+
+    def write_result(item, status, feedback=None, error=None, citations=None):
+        result = {
+            "id": item["id"],
+            "status": status,
+            "pitch": item["pitch"],
+            "trends": item.get("trends", []),
+            "feedback": feedback,
+            "citations": citations or [],
+            "timings": item["timings"],
+        }
+        if error:
+            result["error"] = error
+        with lock:
+            with open(output_path, "a", encoding="utf-8") as out:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+                checkpoint.write(f"{item['id']}\t{status}\n")
+            for stage, seconds in item["timings"].items():
+                timings[stage].append(seconds)
+            counts["completed" if status == "ok" else "failed"] += 1
+            finished = counts["completed"] + counts["failed"]
+        print(f"[{finished}] {item['id']}: {status}")
+
+    def search_item(item):
+        item["timings"]["rate_wait"] = search_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            with span("batch_search", pitch_id=item["id"]):
+                item["trends"] = search(item["query"])
+        except Exception as e:
+            item["trends"] = []
+            print(f"Search failed for {item['id']}: {e}")
+        finished = time.perf_counter()
+        item["timings"]["search"] = finished - started
+        with lock:
+            busy["seconds"]["search"] += finished - started
+        item["queued_at"] = finished
+        feedback_queue.put(item)
+
+    def search_worker():
+        item = None
+        try:
+            while True:
+                item = search_queue.get()
+                if item is _DONE:
+                    return
+                try:
+                    search_item(item)
+                except Exception as e:
+                    with lock:
+                        counts["failed"] += 1
+                    print(f"{item['id']}: search stage failed: {e}")
+        finally:
+            # If the worker dies anyway, keep consuming until its end-of-input
+            # marker so the reader never blocks on a full queue
+            while item is not _DONE:
+                item = search_queue.get()
+                if item is not _DONE:
+                    with lock:
+                        counts["failed"] += 1
+            # The last searcher to finish closes the feedback stage
+            with lock:
+                searchers_left[0] -= 1
+                last = searchers_left[0] == 0
+            if last:
+                for _ in range(feedback_concurrency):
+                    feedback_queue.put(_DONE)
+
+    def evaluate_item(item):
+        item["timings"]["queue_wait"] = time.perf_counter() - item.pop("queued_at")
+        item["timings"]["rate_wait"] += feedback_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            with span("batch_feedback", pitch_id=item["id"]):
+                feedback = evaluate(item["pitch"], item["trends"])
+            citations = None
+            # The default evaluator also returns the sources cited as [n] in the feedback
+            if isinstance(feedback, dict):
+                feedback, citations = feedback["feedback"], feedback["citations"]
+            status, error = "ok", None
+        except Exception as e:
+            feedback, citations, status, error = None, None, "error", str(e)
+        finished = time.perf_counter()
+        item["timings"]["feedback"] = finished - started
+        item["timings"]["total"] = finished - item.pop("started_at")
+        with lock:
+            busy["seconds"]["feedback"] += finished - started
+        write_result(item, status, feedback, error, citations)
+
+    def feedback_worker():
+        item = None
+        try:
+            while True:
+                item = feedback_queue.get()
+                if item is _DONE:
+                    return
+                try:
+                    evaluate_item(item)
+                except Exception as e:
+                    # e.g. the output file can't be written; count it and keep going
+                    with lock:
+                        counts["failed"] += 1
+                    print(f"{item['id']}: failed to record result: {e}")
+        finally:
+            # If the worker dies anyway, keep consuming until the end-of-input
+            # marker so searchers never block forever on a full queue
+            while item is not _DONE:
+                item = feedback_queue.get()
+                if item is not _DONE:
+                    with lock:
+                        counts["failed"] += 1
+
+    workers = [threading.Thread(target=search_worker, name=f"search-{i}") for i in range(search_concurrency)]
+    workers += [threading.Thread(target=feedback_worker, name=f"feedback-{i}") for i in range(feedback_concurrency)]
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    try:
+        for pitch_id, pitch, query in read_pitches(input_path):
+            if pitch_id in done or not pitch:
+                counts["skipped"] += 1
+                continue
+            # Blocks while the search stage is saturated, so huge inputs stream through
+            search_queue.put({"id": pitch_id, "pitch": pitch, "query": query,
+                              "started_at": time.perf_counter(), "timings": {}})
+    finally:
+        for _ in range(search_concurrency):
+            search_queue.put(_DONE)
+        for worker in workers:
+            worker.join()
+    elapsed = time.perf_counter() - started
+
+    if counts["skipped"]:
+        print(f"Skipped {counts['skipped']} pitches (already checkpointed or empty)")
+    summary = summarize(timings, counts, elapsed, busy)
+    if use_corpus:
+        summary["corpus"] = get_corpus().metrics()
+    print_summary(summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pitch_evaluator.batch",
+        description="Evaluate a CSV of startup pitches (search and feedback stages run as a pipeline)"
+    )
+    parser.add_argument("input", help="CSV with a 'pitch' column and optional 'id' and 'query' columns")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--search-concurrency", type=int, default=4, help="Parallel market searches")
+    parser.add_argument("--feedback-concurrency", type=int, default=2, help="Parallel investor feedback calls")
+    parser.add_argument("--search-rate", type=float, default=2.0, help="Searches started per second (0 = unlimited)")
+    parser.add_argument("--feedback-rate", type=float, default=1.0, help="LLM calls started per second (0 = unlimited)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Pitches buffered between stages")
+    parser.add_argument("--max-results", type=int, default=5, help="Search results per sub-query")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run pitches that failed last time")
+    parser.add_argument("--summary-json", help="Also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"Input file not found: {args.input}")
+        sys.exit(1)
+
+    summary = run_batch(
+        args.input, args.output,
+        search_concurrency=max(1, args.search_concurrency),
+        feedback_concurrency=max(1, args.feedback_concurrency),
+        search_rate=args.search_rate,
+        feedback_rate=args.feedback_rate,
+        queue_size=max(1, args.queue_size),
+        max_results=args.max_results,
+        checkpoint_path=args.checkpoint,
+        retry_failed=args.retry_failed,
+    )
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
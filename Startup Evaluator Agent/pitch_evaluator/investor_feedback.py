@@ -0,0 +1,335 @@
+import os
+import time
+import asyncio
+import threading
+import weakref
+from collections import deque
+
+from pitch_evaluator.tracing import current_span, get_tracer
+from pitch_evaluator.trend_ranking import (
+    compress_trends, estimate_tokens, format_citation_table, format_trend_section, token_budget_from_env,
+)
+
+MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are a sharp, professional early-stage investor."
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_TIMEOUT = 60.0
+
+_client = None
+_client_lock = threading.Lock()
+# An async HTTP pool is bound to the event loop that opened it, so keep one per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _prompt(pitch, trend_section):
+    return f"""You're an investor evaluating a startup pitch.
+
+Startup Pitch:
+{pitch}
+
+Relevant Market Trends:
+{trend_section}
+
+Please provide investor-style feedback highlighting strengths, concerns, and potential questions."""
+
+
+def build_prompt(pitch, trends, budget=None, stats=None, citations=None):
+    """Investor prompt for a pitch and its market trends
+
+    Trends are ranked against the pitch and packed into `budget` tokens
+    (PITCH_TREND_TOKEN_BUDGET by default); a budget of 0 joins every raw
+    trend as before. Prompt size figures are written into `stats` and the
+    sources the prompt cites by number are appended to `citations`, if given.
+    """
+    budget = token_budget_from_env() if budget is None else budget
+    raw_section = chr(10).join('- ' + str(trend) for trend in trends)
+    if budget > 0:
+        compressed = compress_trends(pitch, trends, budget)
+        prompt = _prompt(pitch, format_trend_section(compressed))
+        rank_seconds = compressed["stats"]["rank_seconds"]
+        if citations is not None:
+            citations.extend(compressed["citations"])
+    else:
+        prompt = _prompt(pitch, raw_section)
+        rank_seconds = 0.0
+    if stats is not None:
+        stats["prompt_tokens_raw"] = estimate_tokens(SYSTEM_PROMPT + _prompt(pitch, raw_section))
+        stats["prompt_tokens"] = estimate_tokens(SYSTEM_PROMPT + prompt)
+        stats["rank_seconds"] = rank_seconds
+    return prompt
+
+
+def _messages(pitch, trends, budget, stats, citations):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_prompt(pitch, trends, budget, stats, citations)},
+    ]
+
+
+def _pool_settings():
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=int(os.environ.get("PITCH_LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(os.environ.get("PITCH_LLM_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+    )
+    timeout = float(os.environ.get("PITCH_LLM_TIMEOUT", DEFAULT_TIMEOUT))
+    max_retries = int(os.environ.get("PITCH_LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+    return limits, timeout, max_retries
+
+
+def get_client():
+    """Long-lived Groq client with a pooled keep-alive HTTP connection, shared by every call"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            from groq import Groq
+
+            limits, timeout, max_retries = _pool_settings()
+            _client = Groq(
+                http_client=httpx.Client(limits=limits, timeout=timeout),
+                max_retries=max_retries,
+            )
+        return _client
+
+
+def get_async_client():
+    """Pooled AsyncGroq client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from groq import AsyncGroq
+
+        limits, timeout, max_retries = _pool_settings()
+        client = AsyncGroq(
+            http_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+            max_retries=max_retries,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def close_clients():
+    """Close the shared sync client (see aclose_async_client for the async ones)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def aclose_async_client():
+    """Close the running event loop's AsyncGroq client and its connection pool
+
+    Call it before the loop ends (e.g. at the end of the coroutine passed to
+    asyncio.run); dropping the loop alone does not close the pool.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+class LatencyRecorder:
+    """Keeps time-to-first-token and total latency for recent feedback calls"""
+
+    def __init__(self, max_records=1000):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, mode, started, first_token_at, finished, completion_tokens=None, completed=True, error=None,
+               prompt_stats=None):
+        entry = {
+            "mode": mode,
+            "prompt_tokens": None,
+            "prompt_tokens_raw": None,
+            "rank_seconds": None,
+            "ttft_seconds": first_token_at - started if first_token_at else None,
+            "total_seconds": finished - started,
+            "completion_tokens": completion_tokens,
+            "completed": completed,
+            "error": error,
+        }
+        entry.update(prompt_stats or {})
+        with self._lock:
+            self.records.append(entry)
+        return entry
+
+    def summary(self):
+        """Call count, mean/max TTFT and total latency, and mean prompt size before/after trend compression"""
+        with self._lock:
+            records = list(self.records)
+        ttfts = [r["ttft_seconds"] for r in records if r["ttft_seconds"] is not None]
+        totals = [r["total_seconds"] for r in records if r["completed"]]
+        sized = [r for r in records if r["prompt_tokens"] is not None]
+        return {
+            "calls": len(records),
+            "errors": sum(1 for r in records if r["error"]),
+            "ttft_mean": sum(ttfts) / len(ttfts) if ttfts else 0.0,
+            "ttft_max": max(ttfts, default=0.0),
+            "total_mean": sum(totals) / len(totals) if totals else 0.0,
+            "total_max": max(totals, default=0.0),
+            "prompt_tokens_raw_mean": sum(r["prompt_tokens_raw"] for r in sized) / len(sized) if sized else 0.0,
+            "prompt_tokens_mean": sum(r["prompt_tokens"] for r in sized) / len(sized) if sized else 0.0,
+        }
+
+
+latency = LatencyRecorder()
+
+
+def _chunk_text(chunk):
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def _chunk_completion_tokens(chunk):
+    # Groq reports usage on the final streamed chunk under x_groq
+    usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+    return getattr(usage, "completion_tokens", None)
+
+
+def _prepare_call(pitch, trends, budget, citations):
+    """Build the messages, timing prompt construction as its own trace phase"""
+    parent = current_span()
+    prompt_stats = {}
+    wall_started = time.time()
+    started = time.perf_counter()
+    messages = _messages(pitch, trends, budget, prompt_stats, citations)
+    if parent is not None:
+        get_tracer().record("prompt", wall_started, time.perf_counter() - started, parent, **prompt_stats)
+    return messages, prompt_stats, parent
+
+
+def _finish_call(mode, parent, wall_started, started, first_token_at, completion_tokens, completed, error,
+                 prompt_stats):
+    """Record latency for an LLM call and add it to the trace as the "llm" phase"""
+    entry = latency.record(mode, started, first_token_at, time.perf_counter(), completion_tokens, completed, error,
+                           prompt_stats)
+    if parent is not None:
+        get_tracer().record(
+            "llm", wall_started, entry["total_seconds"], parent, error, model=MODEL, mode=mode,
+            ttft_seconds=entry["ttft_seconds"], completion_tokens=completion_tokens, completed=completed,
+        )
+
+
+def stream_investor_feedback(pitch, trends, client=None, mode="stream", budget=None, citations=None):
+    """Yield investor feedback text as it arrives from the model"""
+    client = client or get_client()
+    messages, prompt_stats, parent = _prepare_call(pitch, trends, budget, citations)
+    wall_started = time.time()
+    started = time.perf_counter()
+    first_token_at = None
+    completion_tokens = None
+    completed = False
+    error = None
+    stream = None
+    try:
+        stream = client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            stream=True,
+        )
+        for chunk in stream:
+            completion_tokens = _chunk_completion_tokens(chunk) or completion_tokens
+            text = _chunk_text(chunk)
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield text
+        completed = True
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        # Also reached when the caller stops iterating early; closing the
+        # stream returns its connection to the pool
+        if stream is not None:
+            stream.close()
+        _finish_call(mode, parent, wall_started, started, first_token_at, completion_tokens, completed, error,
+                     prompt_stats)
+
+
+def simulate_investor_feedback(pitch, trends, stream=False, client=None, budget=None, citations=None):
+    """Generate realistic investor feedback with Groq
+
+    Returns the full feedback text, or a generator of text chunks when
+    stream=True. Both paths stream from the API so time-to-first-token is
+    recorded for every call. `budget` caps the tokens spent on trends, and
+    the sources cited as [n] in the prompt are appended to `citations`.
+    """
+    if stream:
+        return stream_investor_feedback(pitch, trends, client, budget=budget, citations=citations)
+    return "".join(stream_investor_feedback(pitch, trends, client, mode="sync", budget=budget, citations=citations))
+
+
+def investor_feedback_with_sources(pitch, trends, client=None, budget=None):
+    """Investor feedback plus the citation table for the [n] sources it was given
+
+    Returns a dict with "feedback", "citations" (number, title, href, host)
+    and "citation_table", the same text the trend_ranking CLI prints.
+    """
+    citations = []
+    feedback = simulate_investor_feedback(pitch, trends, client=client, budget=budget, citations=citations)
+    return {"feedback": feedback, "citations": citations, "citation_table": format_citation_table(citations)}
+
+
+async def astream_investor_feedback(pitch, trends, client=None, budget=None, citations=None):
+    """Async generator of investor feedback text chunks"""
+    client = client or get_async_client()
+    messages, prompt_stats, parent = _prepare_call(pitch, trends, budget, citations)
+    wall_started = time.time()
+    started = time.perf_counter()
+    first_token_at = None
+    completion_tokens = None
+    completed = False
+    error = None
+    stream = None
+    try:
+        stream = await client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            stream=True,
+        )
+        async for chunk in stream:
+            completion_tokens = _chunk_completion_tokens(chunk) or completion_tokens
+            text = _chunk_text(chunk)
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield text
+        completed = True
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        if stream is not None:
+            await stream.close()
+        _finish_call("async", parent, wall_started, started, first_token_at, completion_tokens, completed, error,
+                     prompt_stats)
+
+
+async def simulate_investor_feedback_async(pitch, trends, client=None, budget=None, citations=None):
+    """Async variant of simulate_investor_feedback returning the full text"""
+    return "".join([text async for text in astream_investor_feedback(pitch, trends, client, budget, citations)])
+
+
+async def evaluate_pitches_async(items, max_concurrency=8):
+    """Run feedback for many (pitch, trends) pairs concurrently, in input order
+
+    Failed evaluations come back as the raised exception instead of text.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def evaluate(pitch, trends):
+        async with semaphore:
+            return await simulate_investor_feedback_async(pitch, trends)
+
+    return await asyncio.gather(*(evaluate(pitch, trends) for pitch, trends in items), return_exceptions=True)
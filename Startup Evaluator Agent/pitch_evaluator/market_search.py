@@ -0,0 +1,256 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "market_search")
+DEFAULT_CACHE_TTL = 12 * 60 * 60
+DEFAULT_MAX_WORKERS = 4
+
+# One sub-query per angle an investor cares about
+SUB_QUERY_TEMPLATES = {
+    "market size": "{topic} market size growth {year}",
+    "competitors": "{topic} top competitors brands {year}",
+    "regulation": "{topic} regulation compliance requirements",
+    "consumer trend": "{topic} consumer trends {year}",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "into", "is", "it",
+    "its", "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "we're", "with",
+    "who", "what", "while", "your", "you", "every", "all", "more", "than", "better", "focus",
+    "focuses", "offering", "aims", "strong", "made", "using", "free",
+}
+
+# Words the sub-query templates already cover or that carry no topic
+GENERIC_WORDS = {"market", "markets", "trend", "trends", "industry", "startup", "company", "brand", "products", "product"}
+
+# Query-string parameters that don't change the page (dropped when deduplicating URLs)
+_TRACKING_PARAMS = re.compile(r"^(utm_.*|ref|fbclid|gclid|mc_cid|mc_eid)$")
+
+
+def normalize_query(query):
+    """Lowercase, strip punctuation and collapse whitespace so equivalent queries share a cache key"""
+    query = re.sub(r"[^\w\s-]", " ", query.lower())
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def normalize_url(url):
+    """Canonical form of a URL for deduplication (scheme, www, tracking params, trailing slash)"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(key)
+    ))
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{query}" if query else "")
+
+
+def extract_topic(text, max_words=6):
+    """Short search topic for a pitch or query, built from its most telling keywords
+
+    Short queries keep their word order; long pitches are reduced to their
+    most frequent keywords. Years, filler words and names (words that are
+    always capitalized) are dropped since the sub-query templates add context.
+    """
+    words = re.findall(r"[A-Za-z][A-Za-z-]+", text)
+    always_capitalized = {word.lower() for word in words if word[0].isupper()} - {
+        word.lower() for word in words if not word[0].isupper()
+    }
+    keywords = [
+        word.lower() for word in words
+        if word.lower() not in STOPWORDS and word.lower() not in GENERIC_WORDS and len(word) > 2
+    ]
+    if len(words) <= max_words * 2:
+        return " ".join(dict.fromkeys(keywords))
+
+    counts = {}
+    for word in keywords:
+        if word not in always_capitalized:
+            counts[word] = counts.get(word, 0) + 1
+    # Stable sort keeps first-seen order among equally frequent words
+    ranked = sorted(counts, key=lambda word: -counts[word])
+    return " ".join(ranked[:max_words])
+
+
+def explicit_year(text):
+    """The latest year (1990-2099) written in the text, or None"""
+    years = [int(year) for year in re.findall(r"\b(19[89]\d|20\d\d)\b", text)]
+    return max(years) if years else None
+
+
+def expand_queries(pitch, year=None):
+    """Expand a pitch (or short query) into one sub-query per market angle
+
+    A year written in the pitch ("... trends in 2025") is kept; otherwise the
+    current year is used.
+    """
+    topic = extract_topic(pitch)
+    year = year or explicit_year(pitch) or date.today().year
+    return {aspect: template.format(topic=topic, year=year) for aspect, template in SUB_QUERY_TEMPLATES.items()}
+
+
+class SearchCache:
+    """On-disk JSON cache of search results with a TTL, keyed by normalized query"""
+
+    def __init__(self, cache_dir=None, ttl_seconds=None):
+        self.cache_dir = cache_dir or os.environ.get("PITCH_SEARCH_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if ttl_seconds is None:
+            ttl_seconds = os.environ.get("PITCH_SEARCH_CACHE_TTL", DEFAULT_CACHE_TTL)
+        self.ttl_seconds = float(ttl_seconds)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, query, max_results):
+        key = hashlib.sha256(f"{normalize_query(query)}|{max_results}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, query, max_results):
+        """Cached results for the query, or None when missing or expired"""
+        path = self._path(query, max_results)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        with self._lock:
+            if entry is None or time.time() - entry["fetched_at"] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["results"]
+
+    def set(self, query, max_results, results):
+        path = self._path(query, max_results)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"query": normalize_query(query), "fetched_at": time.time(), "results": results}, f)
+        os.replace(temp_path, path)
+
+
+class DuckDuckGoBackend:
+    """Live web search through duckduckgo_search"""
+
+    def search(self, query, max_results=5):
+        from duckduckgo_search import DDGS
+
+        # A fresh client per call keeps concurrent queries independent
+        with DDGS() as ddgs:
+            return [
+                {"title": r.get("title", "No Title"), "href": r.get("href", "No Link"), "body": r.get("body", "")}
+                for r in ddgs.text(query, max_results=max_results) or []
+            ]
+
+
+class StubSearchBackend:
+    """Deterministic offline backend for tests and demos
+
+    Returns canned results from `results_by_query` (matched by normalized
+    query) or generated placeholders, and records every query it receives.
+    """
+
+    def __init__(self, results_by_query=None, latency_seconds=0.0):
+        self.results_by_query = {normalize_query(q): r for q, r in (results_by_query or {}).items()}
+        self.latency_seconds = latency_seconds
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def search(self, query, max_results=5):
+        with self._lock:
+            self.queries.append(query)
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        normalized = normalize_query(query)
+        if normalized in self.results_by_query:
+            return self.results_by_query[normalized][:max_results]
+        slug = re.sub(r"\s+", "-", normalized)
+        return [
+            {"title": f"Stub result {i + 1} for {query}",
+             "href": f"https://example.com/{slug}/{i + 1}",
+             "body": f"Offline placeholder snippet {i + 1} about {normalized}."}
+            for i in range(max_results)
+        ]
+
+
+def default_backend():
+    """Backend selected by PITCH_SEARCH_BACKEND ("duckduckgo" or "stub")"""
+    if os.environ.get("PITCH_SEARCH_BACKEND", "duckduckgo").lower() == "stub":
+        return StubSearchBackend()
+    return DuckDuckGoBackend()
+
+
+def _cached_search(query, max_results, backend, cache):
+    if cache is not None:
+        cached = cache.get(query, max_results)
+        if cached is not None:
+            return cached
+    try:
+        results = backend.search(query, max_results=max_results)
+    except Exception as e:
+        print(f"Search failed for '{query}': {e}")
+        return []
+    if cache is not None:
+        cache.set(query, max_results, results)
+    return results
+
+
+def dedupe_key(result):
+    """URL of a result, or its title (then snippet) when the backend gave no link"""
+    href = (result.get("href") or "").strip()
+    if href and href != "No Link":
+        return normalize_url(href)
+    return "title:" + normalize_query(result.get("title") or result.get("body") or "")
+
+
+def search_market(pitch, max_results=5, backend=None, cache=None, max_workers=DEFAULT_MAX_WORKERS, queries=None):
+    """Run the pitch's sub-queries concurrently and return results deduplicated by URL
+
+    Each result is a dict with title, href, body and the aspect (market size,
+    competitors, ...) of the sub-query that found it.
+    """
+    backend = backend or default_backend()
+    queries = queries or expand_queries(pitch)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as executor:
+        futures = {
+            aspect: executor.submit(_cached_search, query, max_results, backend, cache)
+            for aspect, query in queries.items()
+        }
+        batches = {aspect: future.result() for aspect, future in futures.items()}
+
+    results = []
+    seen = set()
+    for aspect, batch in batches.items():
+        for result in batch:
+            key = dedupe_key(result)
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append({**result, "aspect": aspect})
+    return results
+
+
+def format_trend(result):
+    """Render a result in the notebook's original trend string format"""
+    return f"{result.get('title', 'No Title')} - {result.get('href', 'No Link')}\n  ↳ {result.get('body', '')}"
+
+
+_default_cache = None
+
+
+def get_market_trends(query, max_results=5, backend=None, cache=None):
+    """Fetch market trends for a query or pitch (concurrent, cached, deduplicated)."""
+    global _default_cache
+    if cache is None:
+        if _default_cache is None:
+            _default_cache = SearchCache()
+        cache = _default_cache
+    return [format_trend(result) for result in search_market(query, max_results, backend, cache)]
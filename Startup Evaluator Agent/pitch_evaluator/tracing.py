@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import atexit
+import random
+import secrets
+import functools
+import threading
+import contextvars
+from collections import deque
+
+DEFAULT_TRACE_FILE = os.path.join(".cache", "traces.jsonl")
+DEFAULT_BUFFER_SPANS = 2048
+DEFAULT_MAX_BUFFER_BYTES = 4 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Rough per-span overhead (ids, timestamps, dict) used for the memory cap
+_SPAN_BASE_BYTES = 300
+
+# The span the current code runs in; _UNSAMPLED marks a trace that was sampled out
+_current_span = contextvars.ContextVar("pitch_trace_span", default=None)
+_UNSAMPLED = object()
+
+
+class JsonlFileExporter:
+    """Appends finished spans to a local JSONL file (works offline, no credentials)"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("PITCH_TRACE_FILE", DEFAULT_TRACE_FILE)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(span, default=str) + "\n" for span in spans))
+
+    def close(self):
+        pass
+
+
+class LangfuseExporter:
+    """Sends finished spans to Langfuse in batches (root spans become traces)"""
+
+    def __init__(self, client=None):
+        from langfuse import Langfuse
+
+        self.client = client or Langfuse()
+
+    def export(self, spans):
+        from datetime import datetime, timezone
+
+        for span in spans:
+            start = datetime.fromtimestamp(span["start"], timezone.utc)
+            end = datetime.fromtimestamp(span["start"] + span["duration_ms"] / 1000, timezone.utc)
+            if span["parent_id"] is None:
+                self.client.trace(id=span["trace_id"], name=span["name"], metadata=span["attributes"],
+                                  timestamp=start)
+            self.client.span(
+                id=span["span_id"], trace_id=span["trace_id"], parent_observation_id=span["parent_id"],
+                name=span["name"], start_time=start, end_time=end, metadata=span["attributes"],
+                level="ERROR" if span["error"] else "DEFAULT", status_message=span["error"],
+            )
+        self.client.flush()
+
+    def close(self):
+        self.client.shutdown()
+
+
+class Span:
+    """A timed operation; finished spans are handed to the tracer's buffer"""
+
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "attributes", "start", "_started", "_token")
+
+    def __init__(self, tracer, name, trace_id, parent_id, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.tracer._finish(self, time.perf_counter() - self._started, repr(exc) if exc else None)
+        return False
+
+
+class _NoopSpan:
+    """Stand-in for spans that are not sampled; every operation is free"""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Marks the rest of an unsampled trace so nested spans are skipped too"""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current_span.set(_UNSAMPLED)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """Sampled tracer with a bounded in-memory buffer flushed in batches by a background thread
+
+    The sampling decision is made once per trace at its root span. Finished
+    spans go into a ring buffer capped both by span count and by approximate
+    bytes; when full, the oldest spans are dropped (and counted) rather than
+    blocking the traced code. A daemon thread exports batches to every
+    exporter, so requests never wait on a tracing backend.
+    """
+
+    def __init__(self, exporters=None, sample_rate=None, max_spans=None, max_bytes=None,
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=None):
+        self.exporters = exporters if exporters is not None else default_exporters()
+        self.sample_rate = float(os.environ.get("PITCH_TRACE_SAMPLE_RATE", 1.0) if sample_rate is None else sample_rate)
+        self.max_bytes = int(max_bytes or os.environ.get("PITCH_TRACE_MAX_BYTES", DEFAULT_MAX_BUFFER_BYTES))
+        self.batch_size = batch_size
+        self.flush_interval = float(flush_interval or os.environ.get("PITCH_TRACE_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL))
+        self._buffer = deque(maxlen=int(max_spans or os.environ.get("PITCH_TRACE_BUFFER", DEFAULT_BUFFER_SPANS)))
+        self._buffer_bytes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        # exported counts spans every exporter accepted; export_failed counts spans at least one exporter lost
+        self.stats = {"traces": 0, "sampled": 0, "spans": 0, "dropped": 0, "exported": 0, "export_failed": 0,
+                      "export_errors": 0}
+        self._thread = None
+        if self.exporters:
+            self._thread = threading.Thread(target=self._run, name="pitch-trace-flush", daemon=True)
+            self._thread.start()
+
+    def span(self, name, **attributes):
+        """Context manager timing a block; starts a new (sampled or not) trace if none is active"""
+        parent = _current_span.get()
+        if parent is _UNSAMPLED:
+            return _NOOP
+        if parent is None:
+            sampled = bool(self.exporters) and random.random() < self.sample_rate
+            with self._lock:
+                self.stats["traces"] += 1
+                self.stats["sampled"] += sampled
+            if not sampled:
+                return _UnsampledRoot()
+            return Span(self, name, secrets.token_hex(16), None, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def record(self, name, started, duration, parent=None, error=None, **attributes):
+        """Add an already-timed span under `parent` (for work that can't run inside a with-block)
+
+        `started` is a time.time() timestamp and `duration` is in seconds.
+        """
+        if parent is None or parent is _UNSAMPLED or isinstance(parent, _NoopSpan):
+            return
+        span = Span(self, name, parent.trace_id, parent.span_id, attributes)
+        span.start = started
+        self._finish(span, duration, error)
+
+    def _finish(self, span, duration, error):
+        data = {
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "start": span.start,
+            "duration_ms": round(duration * 1000, 3),
+            "attributes": span.attributes,
+            "error": error,
+        }
+        size = _SPAN_BASE_BYTES + sum(len(str(value)) for value in span.attributes.values())
+        with self._lock:
+            self.stats["spans"] += 1
+            # Drop the oldest spans to stay under both caps
+            while self._buffer and (len(self._buffer) == self._buffer.maxlen
+                                    or self._buffer_bytes + size > self.max_bytes):
+                self._buffer_bytes -= self._buffer.popleft()[1]
+                self.stats["dropped"] += 1
+            self._buffer.append((data, size))
+            self._buffer_bytes += size
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _drain(self):
+        with self._lock:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                data, size = self._buffer.popleft()
+                self._buffer_bytes -= size
+                batch.append(data)
+        return batch
+
+    def _export(self, batch):
+        failures = 0
+        for exporter in self.exporters:
+            try:
+                exporter.export(batch)
+            except Exception as e:
+                failures += 1
+                print(f"Trace export failed ({type(exporter).__name__}): {e}")
+        with self._lock:
+            self.stats["export_errors"] += failures
+            self.stats["export_failed" if failures else "exported"] += len(batch)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Export everything buffered so far"""
+        batch = self._drain()
+        while batch:
+            self._export(batch)
+            batch = self._drain()
+
+    def metrics(self):
+        with self._lock:
+            return {**self.stats, "buffered": len(self._buffer), "buffered_bytes": self._buffer_bytes}
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+        for exporter in self.exporters:
+            try:
+                exporter.close()
+            except Exception:
+                pass
+
+
+def default_exporters():
+    """Exporters selected by PITCH_TRACE_EXPORTERS ("file", "langfuse", "file,langfuse" or "none")
+
+    By default spans go to the local file, plus Langfuse when its keys are set.
+    """
+    configured = os.environ.get("PITCH_TRACE_EXPORTERS")
+    if configured is None:
+        names = ["file"]
+        if os.environ.get("LANGFUSE_PUBLIC_KEY") and os.environ.get("LANGFUSE_SECRET_KEY"):
+            names.append("langfuse")
+    else:
+        names = [name.strip().lower() for name in configured.split(",") if name.strip()]
+
+    exporters = []
+    for name in names:
+        if name == "file":
+            exporters.append(JsonlFileExporter())
+        elif name == "langfuse":
+            try:
+                exporters.append(LangfuseExporter())
+            except Exception as e:
+                print(f"Langfuse tracing disabled: {e}")
+    return exporters
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Process-wide tracer, flushed on interpreter exit"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+            atexit.register(_tracer.close)
+        return _tracer
+
+
+def current_span():
+    """The active span (None outside a sampled trace)"""
+    span = _current_span.get()
+    return span if isinstance(span, Span) else None
+
+
+def span(name, **attributes):
+    """Time a block as a span of the process-wide tracer"""
+    return get_tracer().span(name, **attributes)
+
+
+def traced(name=None):
+    """Decorator tracing each call of a function as a span (drop-in for Langfuse's @observe())"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
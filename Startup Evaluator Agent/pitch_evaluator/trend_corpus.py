@@ -0,0 +1,338 @@
+import os
+import math
+import time
+import sqlite3
+import argparse
+import threading
+from collections import deque
+
+from pitch_evaluator.market_search import (
+    SUB_QUERY_TEMPLATES, dedupe_key, extract_topic, format_trend, search_market,
+)
+from pitch_evaluator.tracing import span
+from pitch_evaluator.trend_ranking import BM25_B, BM25_K1, tokenize
+
+DEFAULT_CORPUS_PATH = os.path.join(".cache", "trend_corpus.sqlite3")
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+DEFAULT_MIN_DOCUMENTS = 8
+# Share of the pitch's topic terms that fresh documents must contain
+MIN_TERM_COVERAGE = 0.6
+# Stale documents are kept this many freshness windows before being deleted
+RETENTION_FACTOR = 4
+
+
+class TrendCorpus:
+    """Persistent corpus of fetched trend documents with an inverted index, backed by SQLite
+
+    Pitches in the same domain share documents: a lookup ranks fresh
+    documents against the pitch's topic terms, and callers only search live
+    when coverage is too thin.
+    """
+
+    def __init__(self, path=None, max_age_seconds=None, min_documents=None):
+        self.path = path or os.environ.get("PITCH_CORPUS_PATH", DEFAULT_CORPUS_PATH)
+        self.max_age_seconds = float(max_age_seconds or os.environ.get("PITCH_CORPUS_MAX_AGE", DEFAULT_MAX_AGE))
+        self.min_documents = int(min_documents or os.environ.get("PITCH_CORPUS_MIN_DOCUMENTS", DEFAULT_MIN_DOCUMENTS))
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "live_searches": 0, "coalesced_searches": 0}
+        self._lookup_seconds = deque(maxlen=1000)
+        # Live searches in progress, by topic terms
+        self._flights = {}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                url_key TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                href TEXT NOT NULL,
+                body TEXT NOT NULL,
+                aspect TEXT,
+                length INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_fetched ON documents (fetched_at)")
+        self._conn.commit()
+
+    def add_documents(self, results):
+        """Insert or refresh search results (dicts with title, href, body and aspect) and index their terms"""
+        now = time.time()
+        with self._lock:
+            for result in results:
+                # Results without a real link are keyed by title, like search_market's dedupe
+                url_key = dedupe_key(result)
+                if url_key == "title:":
+                    continue
+                terms = tokenize(f"{result.get('title', '')} {result.get('body', '')}")
+                row = self._conn.execute("SELECT id FROM documents WHERE url_key = ?", (url_key,)).fetchone()
+                if row:
+                    doc_id = row[0]
+                    self._conn.execute(
+                        "UPDATE documents SET title = ?, href = ?, body = ?, aspect = ?, length = ?, fetched_at = ? "
+                        "WHERE id = ?",
+                        (result.get("title", ""), result.get("href", ""), result.get("body", ""),
+                         result.get("aspect"), len(terms), now, doc_id),
+                    )
+                    self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                else:
+                    doc_id = self._conn.execute(
+                        "INSERT INTO documents (url_key, title, href, body, aspect, length, fetched_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (url_key, result.get("title", ""), result.get("href", ""), result.get("body", ""),
+                         result.get("aspect"), len(terms), now),
+                    ).lastrowid
+                counts = {}
+                for term in terms:
+                    counts[term] = counts.get(term, 0) + 1
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in counts.items()],
+                )
+            self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now):
+        """Delete documents (and their postings) past the retention window"""
+        cutoff = now - self.max_age_seconds * RETENTION_FACTOR
+        self._conn.execute(
+            "DELETE FROM postings WHERE doc_id IN (SELECT id FROM documents WHERE fetched_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM documents WHERE fetched_at < ?", (cutoff,))
+
+    def lookup(self, pitch, limit=20, record=True):
+        """Rank fresh documents against the pitch's topic terms
+
+        Returns (documents, covered): documents are result dicts with a
+        score, best first; covered says whether the corpus holds enough
+        fresh, relevant documents to skip a live search. Set record=False
+        to leave the hit/miss metrics untouched.
+        """
+        started = time.perf_counter()
+        terms = list(dict.fromkeys(tokenize(extract_topic(pitch))))
+        fresh_after = time.time() - self.max_age_seconds
+        rows = []
+        if terms:
+            placeholders = ", ".join("?" for _ in terms)
+            with self._lock:
+                total_docs, average_length = self._conn.execute(
+                    "SELECT COUNT(*), AVG(length) FROM documents WHERE fetched_at >= ?", (fresh_after,)
+                ).fetchone()
+                rows = self._conn.execute(
+                    f"""SELECT p.term, p.doc_id, p.tf, d.length FROM postings p
+                        JOIN documents d ON d.id = p.doc_id
+                        WHERE p.term IN ({placeholders}) AND d.fetched_at >= ?""",
+                    (*terms, fresh_after),
+                ).fetchall()
+
+        document_frequency = {}
+        for term, _, _, _ in rows:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+        scores = {}
+        matched_terms = {}
+        for term, doc_id, tf, length in rows:
+            df = document_frequency[term]
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1.0))
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+            matched_terms[doc_id] = matched_terms.get(doc_id, 0) + 1
+
+        # A document counts towards coverage when it matches two topic terms, not a single word
+        needed_matches = min(2, len(terms))
+        relevant = [doc_id for doc_id, count in matched_terms.items() if count >= needed_matches]
+        term_coverage = len(document_frequency) / len(terms) if terms else 0.0
+        covered = len(relevant) >= self.min_documents and term_coverage >= MIN_TERM_COVERAGE
+
+        ranked = sorted(relevant, key=lambda doc_id: -scores[doc_id])[:limit]
+        documents = []
+        if ranked:
+            placeholders = ", ".join("?" for _ in ranked)
+            with self._lock:
+                found = {
+                    row[0]: row for row in self._conn.execute(
+                        f"SELECT id, title, href, body, aspect FROM documents WHERE id IN ({placeholders})",
+                        ranked,
+                    )
+                }
+            documents = [
+                {"title": found[doc_id][1], "href": found[doc_id][2], "body": found[doc_id][3],
+                 "aspect": found[doc_id][4], "score": round(scores[doc_id], 3)}
+                for doc_id in ranked if doc_id in found
+            ]
+
+        if record:
+            with self._lock:
+                self._stats["lookups"] += 1
+                self._stats["hits" if covered else "misses"] += 1
+                self._lookup_seconds.append(time.perf_counter() - started)
+        return documents, covered
+
+    def record_live_search(self):
+        with self._lock:
+            self._stats["live_searches"] += 1
+
+    def join_live_search(self, key):
+        """Return (flight, leader) for the live search of a topic key
+
+        The first caller becomes the leader and must call finish_live_search;
+        concurrent callers for the same key get the same flight and wait on
+        flight["done"] for its results instead of searching again.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats["coalesced_searches"] += 1
+                return flight, False
+            flight = {"done": threading.Event(), "results": None}
+            self._flights[key] = flight
+            return flight, True
+
+    def finish_live_search(self, key, flight, results):
+        """Hand a leader's results (None on failure) to the callers waiting on its flight"""
+        flight["results"] = results
+        with self._lock:
+            self._flights.pop(key, None)
+        flight["done"].set()
+
+    def metrics(self):
+        """Index size, lookup latency and hit rate for capacity planning"""
+        with self._lock:
+            documents, fresh = self._conn.execute(
+                "SELECT COUNT(*), SUM(fetched_at >= ?) FROM documents", (time.time() - self.max_age_seconds,)
+            ).fetchone()
+            postings, terms = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT term) FROM postings").fetchone()
+            stats = dict(self._stats)
+            latencies = sorted(self._lookup_seconds)
+        size_bytes = sum(
+            os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix)
+        )
+        return {
+            "documents": documents,
+            "fresh_documents": fresh or 0,
+            "terms": terms,
+            "postings": postings,
+            "size_bytes": size_bytes,
+            "lookups": stats["lookups"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_ratio": stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0,
+            "live_searches": stats["live_searches"],
+            "coalesced_searches": stats["coalesced_searches"],
+            "lookup_ms_mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "lookup_ms_p95": latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)] * 1000
+            if latencies else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM documents")
+            self._conn.commit()
+
+
+_default_corpus = None
+_default_corpus_lock = threading.Lock()
+
+
+def get_corpus():
+    """Process-wide corpus at PITCH_CORPUS_PATH"""
+    global _default_corpus
+    with _default_corpus_lock:
+        if _default_corpus is None:
+            _default_corpus = TrendCorpus()
+        return _default_corpus
+
+
+def _live_search(corpus, query, max_results, backend, cache):
+    """Live search for a query, shared with concurrent misses on the same topic terms
+
+    Returns (results, coalesced); coalesced is True when another caller's
+    search was reused. If that search failed, this caller searches itself.
+    """
+    key = tuple(sorted(set(tokenize(extract_topic(query))))) or query
+    flight, leader = corpus.join_live_search(key)
+    if not leader:
+        flight["done"].wait()
+        if flight["results"] is not None:
+            return flight["results"], True
+    results = None
+    try:
+        corpus.record_live_search()
+        with span("live_search"):
+            results = search_market(query, max_results, backend, cache)
+        corpus.add_documents(results)
+        return results, False
+    finally:
+        if leader:
+            corpus.finish_live_search(key, flight, results)
+
+
+def find_market_trends(query, max_results=5, corpus=None, backend=None, cache=None):
+    """Market trends for a query or pitch, served from the shared corpus when it covers the domain
+
+    Falls back to a live multi-query search (whose results are added to the
+    corpus) when fresh coverage is too thin. Returns trend strings in the
+    same format as get_market_trends. Concurrent misses in the same domain
+    share one live search.
+    """
+    corpus = corpus or get_corpus()
+    limit = max_results * len(SUB_QUERY_TEMPLATES)
+    with span("search") as search_span:
+        documents, covered = corpus.lookup(query, limit)
+        coalesced = False
+        if not covered:
+            results, coalesced = _live_search(corpus, query, max_results, backend, cache)
+            documents, _ = corpus.lookup(query, limit, record=False)
+            # Anything the live search found that the topic terms miss is still worth showing
+            seen = {dedupe_key(document) for document in documents}
+            documents += [result for result in results if dedupe_key(result) not in seen]
+            documents = documents[:limit]
+        search_span.set(corpus_hit=covered, coalesced=coalesced, documents=len(documents))
+    return [format_trend(document) for document in documents]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pitch_evaluator.trend_corpus",
+        description="Inspect the shared market-trend corpus"
+    )
+    parser.add_argument("command", choices=["stats", "lookup", "clear"])
+    parser.add_argument("query", nargs="?", help="Pitch or query text for lookup")
+    args = parser.parse_args(argv)
+
+    corpus = TrendCorpus()
+    if args.command == "clear":
+        corpus.clear()
+        print("Corpus cleared")
+        return
+    if args.command == "lookup":
+        if not args.query:
+            parser.error("lookup needs a query")
+        documents, covered = corpus.lookup(args.query)
+        print(f"Coverage {'sufficient' if covered else 'too thin'}: {len(documents)} relevant documents")
+        for document in documents[:10]:
+            print(f"  {document['score']:6.2f}  {document['title']} - {document['href']}")
+
+    metrics = corpus.metrics()
+    print(f"Documents: {metrics['documents']} ({metrics['fresh_documents']} fresh)  Terms: {metrics['terms']}  "
+          f"Postings: {metrics['postings']}  Size: {metrics['size_bytes'] / 1024:.0f} KiB")
+    if metrics["lookups"]:
+        print(f"Lookups: {metrics['lookups']}  Hit ratio: {metrics['hit_ratio']:.0%}  "
+              f"Latency: {metrics['lookup_ms_mean']:.1f} ms mean, {metrics['lookup_ms_p95']:.1f} ms p95")
+        print(f"Live searches: {metrics['live_searches']}  Coalesced: {metrics['coalesced_searches']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import os
+import re
+import math
+import time
+import argparse
+from urllib.parse import urlsplit
+
+from pitch_evaluator.market_search import STOPWORDS
+
+DEFAULT_TOKEN_BUDGET = 600
+DEFAULT_MAX_SNIPPET_TOKENS = 80
+DUPLICATE_THRESHOLD = 0.6
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def estimate_tokens(text):
+    """Rough token count for prompt budgeting (about 4 characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+def tokenize(text):
+    """Lowercase content words of a text, without stopwords"""
+    return [word for word in re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", text.lower())
+            if word not in STOPWORDS and len(word) > 1]
+
+
+def parse_trend(trend):
+    """Split a trend into title, href and body (accepts dicts or "title - href\\n  ↳ body" strings)"""
+    if isinstance(trend, dict):
+        return {"title": trend.get("title", ""), "href": trend.get("href", ""), "body": trend.get("body", "")}
+    head, _, body = trend.partition("\n")
+    title, separator, href = head.rpartition(" - ")
+    if not separator:
+        title, href = head, ""
+    return {"title": title.strip(), "href": href.strip(), "body": body.strip().lstrip("↳").strip()}
+
+
+def bm25_scores(query_tokens, documents):
+    """BM25 score of each tokenized document against the query terms"""
+    if not documents:
+        return []
+    average_length = sum(len(doc) for doc in documents) / len(documents) or 1.0
+    document_frequency = {}
+    for doc in documents:
+        for term in set(doc):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+
+    query_terms = set(query_tokens)
+    scores = []
+    for doc in documents:
+        counts = {}
+        for term in doc:
+            if term in query_terms:
+                counts[term] = counts.get(term, 0) + 1
+        score = 0.0
+        for term, frequency in counts.items():
+            df = document_frequency[term]
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / average_length)
+            score += idf * frequency * (BM25_K1 + 1) / norm
+        scores.append(score)
+    return scores
+
+
+def _shingles(tokens, size=3):
+    # A snippet with no words has no shingles, so it never counts as a duplicate
+    if not tokens:
+        return set()
+    if len(tokens) < size:
+        return {tuple(tokens)}
+    return {tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _truncate(text, max_tokens):
+    """Cut text to roughly max_tokens, preferring a sentence boundary"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * 4]
+    sentence_end = cut.rfind(". ")
+    if sentence_end > len(cut) // 2:
+        return cut[:sentence_end + 1]
+    return cut.rsplit(" ", 1)[0] + "…"
+
+
+def _host(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def compress_trends(pitch, trends, token_budget=DEFAULT_TOKEN_BUDGET, max_snippet_tokens=DEFAULT_MAX_SNIPPET_TOKENS):
+    """Rank trend snippets against the pitch and pack the best ones into a token budget
+
+    Snippets are scored with BM25 against the pitch, snippets sharing no
+    terms with it and near-duplicates of a better snippet are dropped, URLs
+    move into a numbered citation table and the highest-ranked snippets are
+    added until the budget is used. Returns a dict with the prompt lines,
+    the citations and size statistics.
+    """
+    started = time.perf_counter()
+    parsed = [parse_trend(trend) for trend in trends]
+    documents = [tokenize(f"{item['title']} {item['body']}") for item in parsed]
+    scores = bm25_scores(tokenize(pitch), documents)
+    # Stable sort keeps search order among equal scores
+    ranked = sorted(range(len(parsed)), key=lambda i: -scores[i])
+    # If nothing matches the pitch (e.g. a very short pitch) keep everything rather than nothing
+    any_relevant = any(score > 0 for score in scores)
+
+    lines = []
+    citations = []
+    kept_shingles = []
+    used_tokens = 0
+    dropped_irrelevant = 0
+    dropped_duplicates = 0
+    dropped_budget = 0
+    for i in ranked:
+        if any_relevant and scores[i] <= 0:
+            dropped_irrelevant += 1
+            continue
+        shingles = _shingles(documents[i])
+        if any(_similarity(shingles, other) >= DUPLICATE_THRESHOLD for other in kept_shingles):
+            dropped_duplicates += 1
+            continue
+        item = parsed[i]
+        number = len(citations) + 1
+        body = _truncate(item["body"], max_snippet_tokens)
+        line = f"[{number}] {item['title']}: {body}" if body else f"[{number}] {item['title']}"
+        # The line plus its compact "[n] host" entry in the sources list
+        cost = estimate_tokens(line) + estimate_tokens(f"[{number}] {_host(item['href'])}, ")
+        if used_tokens + cost > token_budget:
+            dropped_budget += 1
+            continue
+        used_tokens += cost
+        kept_shingles.append(shingles)
+        lines.append(line)
+        citations.append({"number": number, "title": item["title"], "href": item["href"],
+                          "host": _host(item["href"]), "score": round(scores[i], 3)})
+
+    raw_text = "\n".join("- " + str(trend) for trend in trends)
+    return {
+        "lines": lines,
+        "citations": citations,
+        "stats": {
+            "snippets_in": len(trends),
+            "snippets_kept": len(lines),
+            "dropped_irrelevant": dropped_irrelevant,
+            "dropped_duplicates": dropped_duplicates,
+            "dropped_budget": dropped_budget,
+            "tokens_before": estimate_tokens(raw_text),
+            "tokens_after": used_tokens,
+            "rank_seconds": time.perf_counter() - started,
+        },
+    }
+
+
+def format_trend_section(compressed):
+    """Prompt text for compressed trends: numbered snippets then a compact sources line"""
+    text = "\n".join("- " + line for line in compressed["lines"])
+    if compressed["citations"]:
+        text += "\n\nSources: " + ", ".join(
+            f"[{c['number']}] {c['host'] or 'unknown'}" for c in compressed["citations"]
+        )
+    return text
+
+
+def format_citation_table(compressed):
+    """Full citation table (numbers, titles and URLs) for showing alongside the feedback
+
+    Accepts the result of compress_trends or its list of citations.
+    """
+    citations = compressed["citations"] if isinstance(compressed, dict) else compressed
+    return "\n".join(f"[{c['number']}] {c['title']} - {c['href'] or 'no link'}" for c in citations)
+
+
+def token_budget_from_env():
+    """Trend token budget from PITCH_TREND_TOKEN_BUDGET (0 disables compression)"""
+    return int(os.environ.get("PITCH_TREND_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+
+def main(argv=None):
+    from pitch_evaluator.market_search import get_market_trends
+    from pitch_evaluator.investor_feedback import build_prompt, latency, simulate_investor_feedback
+
+    parser = argparse.ArgumentParser(
+        prog="python -m pitch_evaluator.trend_ranking",
+        description="Compare investor prompt size (and optionally LLM latency) with and without trend compression"
+    )
+    parser.add_argument("pitch_file", help="Text file containing the pitch")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Token budget for trend snippets")
+    parser.add_argument("--max-results", type=int, default=5, help="Search results per sub-query")
+    parser.add_argument("--llm", action="store_true", help="Also call the LLM with both prompts and compare latency")
+    args = parser.parse_args(argv)
+
+    with open(args.pitch_file, "r", encoding="utf-8") as f:
+        pitch = f.read().strip()
+    trends = get_market_trends(pitch, max_results=args.max_results)
+    compressed = compress_trends(pitch, trends, args.budget)
+    stats = compressed["stats"]
+
+    print(f"Snippets: {stats['snippets_in']} in, {stats['snippets_kept']} kept "
+          f"({stats['dropped_irrelevant']} irrelevant, {stats['dropped_duplicates']} near-duplicates, "
+          f"{stats['dropped_budget']} over budget)")
+    print(f"Ranking took {stats['rank_seconds'] * 1000:.1f} ms")
+    print(f"Prompt tokens: {estimate_tokens(build_prompt(pitch, trends, budget=0))} before, "
+          f"{estimate_tokens(build_prompt(pitch, trends, budget=args.budget))} after")
+    print("\nCitations:\n" + format_citation_table(compressed))
+
+    if args.llm:
+        for label, budget in (("before", 0), ("after", args.budget)):
+            simulate_investor_feedback(pitch, trends, budget=budget)
+            record = latency.records[-1]
+            print(f"LLM {label}: time to first token {record['ttft_seconds'] or 0:.2f}s, "
+                  f"total {record['total_seconds']:.2f}s, {record['prompt_tokens']} prompt tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import time
+import threading
+from pitch_evaluator.batch import run_batch
+from pitch_evaluator.batch_common import RateLimiter
+
+
+def write_csv(path, pitches):
+    path.write_text("id,pitch\n" + "".join(f"{i},{pitch}\n" for i, pitch in enumerate(pitches, 1)), encoding="utf-8")
+    return str(path)
+
+
+def test_results_checkpoint_and_resume(tmp_path):
+    input_path = write_csv(tmp_path / "in.csv", ["soap brand", "fail this one", "coffee subscription"])
+    output = str(tmp_path / "out.jsonl")
+
+    def evaluate(pitch, trends):
+        if "fail" in pitch:
+            raise RuntimeError("upstream error")
+        return f"feedback on {pitch} with {len(trends)} trends"
+
+    summary = run_batch(input_path, output, search_rate=0, feedback_rate=0,
+                        search=lambda query: [f"trend for {query}"], evaluate=evaluate)
+    assert (summary["completed"], summary["failed"]) == (2, 1)
+    rows = {row["id"]: row for row in map(json.loads, open(output, encoding="utf-8"))}
+    assert rows["1"]["feedback"] == "feedback on soap brand with 1 trends"
+    assert rows["2"]["status"] == "error"
+    assert set(rows["1"]["timings"]) == {"search", "feedback", "queue_wait", "rate_wait", "total"}
+
+    calls = []
+    run_batch(input_path, output, search_rate=0, feedback_rate=0, retry_failed=True,
+              search=lambda query: [], evaluate=lambda pitch, trends: calls.append(pitch) or "ok")
+    assert calls == ["fail this one"]
+
+
+def test_citations_from_the_evaluator_are_stored(tmp_path):
+    input_path = write_csv(tmp_path / "in.csv", ["soap brand"])
+    output = str(tmp_path / "out.jsonl")
+    citation = {"number": 1, "title": "Soap", "href": "https://example.com", "host": "example.com", "score": 1.0}
+    run_batch(input_path, output, search_rate=0, feedback_rate=0, search=lambda query: [],
+              evaluate=lambda pitch, trends: {"feedback": "See [1].", "citations": [citation]})
+    row = json.loads(open(output, encoding="utf-8").readline())
+    assert row["feedback"] == "See [1]."
+    assert row["citations"] == [citation]
+
+
+def test_unwritable_output_does_not_hang_the_pipeline(tmp_path):
+    input_path = write_csv(tmp_path / "in.csv", [f"pitch {i}" for i in range(20)])
+    output = str(tmp_path / "missing-dir" / "out.jsonl")
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(run_batch(
+        input_path, output, search_concurrency=2, feedback_concurrency=1, queue_size=1,
+        search_rate=0, feedback_rate=0, search=lambda query: [], evaluate=lambda pitch, trends: "ok",
+    )), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert result["failed"] == 20
+
+
+def test_queue_wait_excludes_rate_limiter_wait(tmp_path):
+    input_path = write_csv(tmp_path / "in.csv", ["a", "b", "c"])
+    output = str(tmp_path / "out.jsonl")
+    run_batch(input_path, output, search_concurrency=3, feedback_concurrency=1, search_rate=0,
+              feedback_rate=10, search=lambda query: [], evaluate=lambda pitch, trends: "ok")
+    rows = list(map(json.loads, open(output, encoding="utf-8")))
+    assert max(row["timings"]["rate_wait"] for row in rows) > 0.05
+    for row in rows:
+        assert row["timings"]["queue_wait"] + row["timings"]["rate_wait"] <= row["timings"]["total"] + 1e-6
+
+
+def test_rate_limiter_reports_wait():
+    limiter = RateLimiter(20, burst=1)
+    assert limiter.acquire() == 0.0
+    started = time.monotonic()
+    waited = limiter.acquire()
+    assert 0.03 < waited <= time.monotonic() - started + 1e-3
+
+
+
+def test_failing_search_stage_still_closes_the_feedback_stage(tmp_path, monkeypatch):
+    class BrokenSearchLimiter(RateLimiter):
+        def acquire(self):
+            if self.rate == 5:
+                raise RuntimeError("limiter broke")
+            return 0.0
+
+    monkeypatch.setattr("pitch_evaluator.batch.RateLimiter", BrokenSearchLimiter)
+    input_path = write_csv(tmp_path / "in.csv", [f"pitch {i}" for i in range(20)])
+    output = str(tmp_path / "out.jsonl")
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(run_batch(
+        input_path, output, search_concurrency=2, feedback_concurrency=2, queue_size=1,
+        search_rate=5, feedback_rate=0, search=lambda query: [], evaluate=lambda pitch, trends: "ok",
+    )), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert result["failed"] == 20
@@ -0,0 +1,13 @@
+import os
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(APP_DIR)
+
+
+def test_batch_common_matches_the_symptom_recognizer_copy():
+    other = os.path.join(REPO_DIR, "Symptom Recognizer", "utils", "batch_common.py")
+    if not os.path.exists(other):
+        pytest.skip("Symptom Recognizer is not checked out next to this app")
+    with open(os.path.join(APP_DIR, "pitch_evaluator", "batch_common.py"), "rb") as f, open(other, "rb") as g:
+        assert f.read() == g.read(), "pitch_evaluator/batch_common.py differs from the Symptom Recognizer copy"
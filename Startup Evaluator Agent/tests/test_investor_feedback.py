@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from pitch_evaluator import investor_feedback
+from pitch_evaluator.investor_feedback import (
+    astream_investor_feedback, simulate_investor_feedback, stream_investor_feedback,
+)
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    def __init__(self, texts):
+        self.chunks = [chunk(text) for text in texts]
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncStream(FakeStream):
+    def __aiter__(self):
+        async def generate():
+            for item in self.chunks:
+                yield item
+        return generate()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.stream = stream
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.requests.append(request)
+        return self.stream
+
+
+class FakeAsyncClient(FakeClient):
+    async def create(self, **request):
+        self.requests.append(request)
+        return self.stream
+
+
+def test_full_feedback_is_joined_and_stream_closed():
+    stream = FakeStream(["Strong ", "team."])
+    client = FakeClient(stream)
+    assert simulate_investor_feedback("pitch", ["trend"], client=client, budget=0) == "Strong team."
+    assert stream.closed
+    assert client.requests[0]["stream"] is True
+
+
+def test_stream_is_closed_when_the_consumer_stops_early():
+    stream = FakeStream(["a", "b", "c"])
+    chunks = stream_investor_feedback("pitch", [], client=FakeClient(stream), budget=0)
+    assert next(chunks) == "a"
+    chunks.close()
+    assert stream.closed
+    assert investor_feedback.latency.records[-1]["completed"] is False
+
+
+def test_async_stream_is_closed():
+    stream = FakeAsyncStream(["x", "y"])
+
+    async def consume():
+        return "".join([text async for text in astream_investor_feedback("pitch", [], FakeAsyncClient(stream), 0)])
+
+    assert asyncio.run(consume()) == "xy"
+    assert stream.closed
+
+
+def test_aclose_async_client_closes_the_loops_pool(monkeypatch):
+    pytest.importorskip("groq")
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+
+    async def open_and_close():
+        client = investor_feedback.get_async_client()
+        assert investor_feedback.get_async_client() is client
+        await investor_feedback.aclose_async_client()
+        return client
+
+    assert asyncio.run(open_and_close()).is_closed()
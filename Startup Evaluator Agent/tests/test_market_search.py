@@ -0,0 +1,58 @@
+import time
+from datetime import date
+from pitch_evaluator.market_search import (
+    SearchCache, StubSearchBackend, expand_queries, extract_topic, get_market_trends, normalize_url, search_market,
+)
+
+
+def test_extract_topic_keeps_short_query_order():
+    assert extract_topic("Sustainable handmade soap market trends") == "sustainable handmade soap"
+
+
+def test_expand_queries_keeps_an_explicit_year():
+    queries = expand_queries("handmade soap trends in 2025")
+    assert all("2026" not in query for query in queries.values())
+    assert "2025" in queries["market size"]
+    assert str(date.today().year) in expand_queries("handmade soap")["market size"]
+    assert "2030" in expand_queries("soap", year=2030)["consumer trend"]
+
+
+def test_normalize_url():
+    assert normalize_url("https://www.Example.com/a/?utm_source=x&b=2") == normalize_url("http://example.com/a?b=2")
+
+
+def test_results_are_deduplicated_by_url():
+    duplicate = {"title": "Soap market", "href": "https://www.example.com/soap/?utm_source=ddg", "body": "a"}
+    same_page = {"title": "Soap market (copy)", "href": "https://example.com/soap", "body": "b"}
+    backend = StubSearchBackend(results_by_query={query: [duplicate, same_page]
+                                                  for query in expand_queries("soap", year=2025).values()})
+    results = search_market("soap", queries=expand_queries("soap", year=2025), backend=backend)
+    assert len(results) == 1
+    assert results[0]["aspect"] == "market size"
+
+
+def test_results_without_links_are_deduplicated_by_title():
+    results_by_query = {"soap": [
+        {"title": "Soap A", "href": "No Link", "body": "a"},
+        {"title": "Soap B", "href": "No Link", "body": "b"},
+        {"title": "Soap A", "href": "No Link", "body": "a again"},
+    ]}
+    results = search_market("soap", backend=StubSearchBackend(results_by_query), queries={"market size": "soap"})
+    assert [result["title"] for result in results] == ["Soap A", "Soap B"]
+
+
+def test_sub_queries_are_cached(tmp_path):
+    cache = SearchCache(cache_dir=str(tmp_path))
+    backend = StubSearchBackend()
+    first = get_market_trends("handmade soap", max_results=2, backend=backend, cache=cache)
+    second = get_market_trends("Handmade  soap!", max_results=2, backend=backend, cache=cache)
+    assert first == second
+    assert len(backend.queries) == 4
+    assert cache.hits == 4
+
+
+def test_zero_ttl_is_respected(tmp_path):
+    cache = SearchCache(cache_dir=str(tmp_path), ttl_seconds=0)
+    cache.set("soap", 5, [{"title": "t"}])
+    time.sleep(0.01)
+    assert cache.get("soap", 5) is None
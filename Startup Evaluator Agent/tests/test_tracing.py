@@ -0,0 +1,84 @@
+import threading
+from pitch_evaluator.tracing import Tracer
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def close(self):
+        pass
+
+
+class FailingExporter(ListExporter):
+    def export(self, spans):
+        raise RuntimeError("backend down")
+
+
+def make_tracer(*exporters, sample_rate=1.0):
+    # A long flush interval keeps the background thread out of the way; tests flush explicitly
+    return Tracer(exporters=list(exporters), sample_rate=sample_rate, flush_interval=60)
+
+
+def test_spans_are_exported_with_their_parent():
+    exporter = ListExporter()
+    tracer = make_tracer(exporter)
+    with tracer.span("root"):
+        with tracer.span("child"):
+            pass
+    tracer.flush()
+    child, root = exporter.spans
+    assert child["parent_id"] == root["span_id"] and child["trace_id"] == root["trace_id"]
+    assert tracer.metrics()["exported"] == 2
+
+
+def test_failed_exports_are_not_counted_as_exported():
+    tracer = make_tracer(ListExporter(), FailingExporter())
+    with tracer.span("root"):
+        pass
+    tracer.flush()
+    metrics = tracer.metrics()
+    assert metrics["exported"] == 0
+    assert metrics["export_failed"] == 1
+    assert metrics["export_errors"] == 1
+
+
+def test_unsampled_traces_are_counted_but_not_buffered():
+    tracer = make_tracer(ListExporter(), sample_rate=0.0)
+    with tracer.span("root"):
+        with tracer.span("child"):
+            pass
+    metrics = tracer.metrics()
+    assert (metrics["traces"], metrics["sampled"], metrics["spans"], metrics["buffered"]) == (1, 0, 0, 0)
+
+
+def test_trace_counts_are_exact_under_concurrency():
+    tracer = make_tracer(ListExporter(), sample_rate=0.5)
+
+    def worker():
+        for _ in range(500):
+            with tracer.span("root"):
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics = tracer.metrics()
+    assert metrics["traces"] == 4000
+    assert metrics["sampled"] == metrics["spans"]
+
+
+def test_full_buffer_drops_oldest_spans():
+    exporter = ListExporter()
+    tracer = Tracer(exporters=[exporter], max_spans=2, flush_interval=60)
+    for name in ["a", "b", "c"]:
+        with tracer.span(name):
+            pass
+    tracer.flush()
+    assert [span["name"] for span in exporter.spans] == ["b", "c"]
+    assert tracer.metrics()["dropped"] == 1
@@ -0,0 +1,51 @@
+import threading
+from pitch_evaluator.market_search import StubSearchBackend
+from pitch_evaluator.trend_corpus import SUB_QUERY_TEMPLATES, TrendCorpus, find_market_trends
+
+PITCH = "Premium handcrafted natural soap brand for clean beauty shoppers"
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_misses_share_one_live_search(tmp_path):
+    corpus = TrendCorpus(path=str(tmp_path / "corpus.sqlite3"), min_documents=1000)
+    backend = StubSearchBackend(latency_seconds=0.05)
+    results = run_concurrently(4, lambda: find_market_trends(PITCH, corpus=corpus, backend=backend))
+    metrics = corpus.metrics()
+    assert metrics["live_searches"] == 1
+    assert metrics["coalesced_searches"] == 3
+    assert len(backend.queries) == len(SUB_QUERY_TEMPLATES)
+    assert all(result and result == results[0] for result in results)
+
+
+def test_a_failed_shared_search_lets_waiters_search_themselves(tmp_path):
+    corpus = TrendCorpus(path=str(tmp_path / "corpus.sqlite3"), min_documents=1000)
+    flight, leader = corpus.join_live_search(("soap",))
+    assert leader
+    assert corpus.join_live_search(("soap",)) == (flight, False)
+    corpus.finish_live_search(("soap",), flight, None)
+    assert flight["done"].is_set()
+    assert corpus.join_live_search(("soap",))[1]
+
+
+def test_results_without_links_are_stored_separately(tmp_path):
+    corpus = TrendCorpus(path=str(tmp_path / "corpus.sqlite3"))
+    corpus.add_documents([
+        {"title": "Natural soap demand rises", "href": "No Link", "body": "Handcrafted soap sales grow."},
+        {"title": "Clean beauty shoppers", "href": "No Link", "body": "Natural soap buyers prefer plastic-free."},
+    ])
+    assert corpus.metrics()["documents"] == 2
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+from pitch_evaluator.investor_feedback import investor_feedback_with_sources
+from pitch_evaluator.trend_ranking import bm25_scores, compress_trends, format_citation_table, tokenize
+
+TRENDS = [
+    {"title": "Sports betting odds", "href": "https://example.com/odds", "body": "Weekly football odds."},
+    {"title": "Natural soap market grows", "href": "https://www.soapnews.com/a",
+     "body": "Handcrafted natural soap sales rose as consumers avoid synthetic ingredients."},
+    {"title": "Natural soap market grows fast", "href": "https://mirror.example.org/a",
+     "body": "Handcrafted natural soap sales rose as consumers avoid synthetic ingredients."},
+    {"title": "Clean beauty retail", "href": "", "body": "Organic stores expand clean beauty shelves."},
+]
+PITCH = "A handcrafted natural soap brand for clean beauty stores"
+
+
+def test_bm25_ranks_matching_documents_first():
+    documents = [tokenize("weather report"), tokenize("natural soap brand"), tokenize("soap")]
+    scores = bm25_scores(tokenize("natural soap"), documents)
+    assert scores[0] == 0
+    assert scores[1] > scores[2] > 0
+
+
+def test_compress_drops_irrelevant_and_duplicate_snippets():
+    compressed = compress_trends(PITCH, TRENDS, token_budget=600)
+    titles = [c["title"] for c in compressed["citations"]]
+    assert "Sports betting odds" not in titles
+    assert len([title for title in titles if title.startswith("Natural soap")]) == 1
+    assert [c["number"] for c in compressed["citations"]] == list(range(1, len(titles) + 1))
+    assert compressed["stats"]["dropped_irrelevant"] == 1
+    assert compressed["stats"]["dropped_duplicates"] == 1
+
+
+def test_compress_respects_the_token_budget():
+    compressed = compress_trends(PITCH, TRENDS, token_budget=25)
+    assert compressed["stats"]["tokens_after"] <= 25
+    assert compressed["stats"]["dropped_budget"] >= 1
+
+
+def test_citation_table_lists_titles_and_urls():
+    compressed = compress_trends(PITCH, TRENDS)
+    table = format_citation_table(compressed)
+    assert table == format_citation_table(compressed["citations"])
+    assert "https://www.soapnews.com/a" in table
+    assert "Clean beauty retail - no link" in table
+
+
+def test_feedback_comes_back_with_its_citation_table():
+    class Stream(list):
+        def close(self):
+            pass
+
+    stream = Stream([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Cite [1]."))])])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **request: stream)))
+    result = investor_feedback_with_sources(PITCH, TRENDS, client=client, budget=600)
+    assert result["feedback"] == "Cite [1]."
+    assert result["citations"][0]["number"] == 1
+    assert result["citation_table"].startswith("[1] ")
+
+
+def test_snippets_without_words_are_not_near_duplicates():
+    trends = [
+        {"title": "...", "href": "https://a.example.com/1", "body": ""},
+        {"title": "!!", "href": "https://b.example.com/2", "body": "-"},
+    ]
+    compressed = compress_trends(PITCH, trends, token_budget=600)
+    assert compressed["stats"]["dropped_duplicates"] == 0
+    assert [c["href"] for c in compressed["citations"]] == ["https://a.example.com/1", "https://b.example.com/2"]
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import tracemalloc
+
+from utils.batch_common import percentile
+from utils.batch_runner import STAGES
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, "corpus.jsonl")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+PERCENTILES = [0.50, 0.90, 0.95, 0.99]
+
+
+def load_corpus(path):
+    """Read (id, text) pairs from a JSONL corpus of symptom descriptions"""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                record = json.loads(line)
+                records.append((str(record.get("id", line_number)), record["symptoms"]))
+    return records
+
+
+def configure_environment(mode, stub_url=None, cache_path=None):
+    """Set the environment before main.py (and its module-level key lookups) is imported"""
+    if mode in ("replay", "stub"):
+        # Replayed and stubbed runs need no real keys and must not export traces
+        os.environ.setdefault("Groq_key", "benchmark-placeholder")
+        os.environ.setdefault("Langfuse_secretkey", "sk-lf-benchmark")
+        os.environ.setdefault("Langfuse_publickey", "pk-lf-benchmark")
+        os.environ["LANGFUSE_TRACING_ENABLED"] = "false"
+    # Live and stub runs still count tokens, so they go through the counting transport
+    os.environ["SYMPTOM_LLM_MODE"] = "count" if mode in ("live", "stub") else mode
+    if stub_url:
+        os.environ["GROQ_BASE_URL"] = stub_url
+    if cache_path:
+        os.environ["SYMPTOM_CACHE_PATH"] = cache_path
+
+
+def run_benchmark(records, repeat=1):
+    """Replay the corpus through SymptomCheckerCrew.process_symptoms and collect measurements"""
+    from main import SymptomCheckerCrew
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    crew = SymptomCheckerCrew()
+    construct_seconds = time.perf_counter() - started
+
+    timings = {stage: [] for stage in STAGES}
+    passes = []
+    errors = []
+    for pass_number in range(1, repeat + 1):
+        pass_totals = []
+        for record_id, text in records:
+            result = crew.process_symptoms(text, verbose=False)
+            if "error" in result:
+                errors.append({"id": record_id, "pass": pass_number, "error": result["error"]})
+                continue
+            for stage, seconds in result["timings"].items():
+                timings.setdefault(stage, []).append(seconds)
+            pass_totals.append(result["timings"]["total"])
+        passes.append({
+            "pass": pass_number,
+            "completed": len(pass_totals),
+            "total_p50": percentile(pass_totals, 0.50),
+            "total_mean": sum(pass_totals) / len(pass_totals) if pass_totals else 0.0,
+        })
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    crew.transport.close()
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+    stages = {}
+    for stage in STAGES:
+        values = timings.get(stage, [])
+        if values:
+            stages[stage] = {"count": len(values), "mean": sum(values) / len(values)}
+            stages[stage].update({f"p{int(p * 100)}": percentile(values, p) for p in PERCENTILES})
+
+    usage = crew.transport.usage
+    return {
+        "records": len(records),
+        "repeat": repeat,
+        "construct_seconds": construct_seconds,
+        "stages": stages,
+        "passes": passes,
+        "errors": errors,
+        "tokens": {
+            "requests": usage["requests"],
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "total_tokens": usage["total_tokens"],
+            "per_record": usage["total_tokens"] / max(1, len(records) * repeat),
+        },
+        "cache": crew.cache.metrics(),
+        "memory": {"python_peak_mb": peak_bytes / (1024 * 1024), "max_rss_mb": max_rss_mb},
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """Return a list of regressions: stage percentiles or tokens worse than baseline by more than tolerance"""
+    regressions = []
+    for stage, stats in report["stages"].items():
+        for metric in ("p50", "p95"):
+            before = baseline.get("stages", {}).get(stage, {}).get(metric)
+            after = stats.get(metric)
+            if before and after is not None and after > before * (1 + tolerance):
+                regressions.append(f"{stage} {metric}: {before:.3f}s -> {after:.3f}s (+{(after / before - 1):.0%})")
+    before = baseline.get("tokens", {}).get("per_record")
+    after = report["tokens"]["per_record"]
+    if before and after > before * (1 + tolerance):
+        regressions.append(f"tokens per record: {before:.0f} -> {after:.0f} (+{(after / before - 1):.0%})")
+    return regressions
+
+
+def print_report(report, regressions=None):
+    """Print the benchmark report in the CLI's plain text style"""
+    print(f"\n{'='*50}")
+    print("SYMPTOM PIPELINE BENCHMARK")
+    print(f"{'='*50}")
+    print(f"Records: {report['records']} x {report['repeat']} passes  "
+          f"Errors: {len(report['errors'])}  Crew startup: {report['construct_seconds']:.2f}s")
+
+    print("\nPer-stage latency (seconds):")
+    print(f"{'stage':<16}{'count':>7}{'mean':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<16}{stats['count']:>7}{stats['mean']:>9.3f}{stats['p50']:>9.3f}"
+              f"{stats['p90']:>9.3f}{stats['p95']:>9.3f}{stats['p99']:>9.3f}")
+
+    print("\nPasses (cache effect):")
+    for item in report["passes"]:
+        print(f"  pass {item['pass']}: {item['completed']} ok, total p50 {item['total_p50']:.3f}s, "
+              f"mean {item['total_mean']:.3f}s")
+
+    tokens = report["tokens"]
+    print(f"\nLLM requests: {tokens['requests']}  Tokens: {tokens['prompt_tokens']} prompt + "
+          f"{tokens['completion_tokens']} completion ({tokens['per_record']:.0f} per record)")
+    cache = report["cache"]
+    print(f"Cache: {cache['hit_ratio']:.0%} hit ratio, {cache['saved_seconds']:.2f}s saved")
+    memory = report["memory"]
+    print(f"Memory: Python peak {memory['python_peak_mb']:.1f} MB, max RSS {memory['max_rss_mb']:.1f} MB")
+
+    for error in report["errors"][:5]:
+        print(f"  ❌ {error['id']} (pass {error['pass']}): {error['error']}")
+
+    if regressions is not None:
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+        else:
+            print("\n✓ No regressions against baseline")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the symptom pipeline per stage")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL corpus of symptom descriptions")
+    parser.add_argument("--mode", choices=["replay", "record", "live", "stub"], default="replay",
+                        help="replay fixtures (default), record them, call Groq live, or use the local stub server")
+    parser.add_argument("--repeat", type=int, default=2, help="Passes over the corpus (later passes show cache effects)")
+    parser.add_argument("--stub-latency-ms", type=float, default=400.0)
+    parser.add_argument("--stub-rate", type=float, default=0.0, help="Stub requests per second before 429s (0 = unlimited)")
+    parser.add_argument("--keep-cache", action="store_true", help="Use the configured cache instead of a fresh one")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's report as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Allowed slowdown before a regression is reported")
+    parser.add_argument("--json", help="Also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    stub_url = None
+    if args.mode == "stub":
+        from bench.stub_llm_server import start_stub_server
+        server, stub_url = start_stub_server(latency_ms=args.stub_latency_ms, rate_per_second=args.stub_rate)
+
+    cache_dir = None if args.keep_cache else tempfile.mkdtemp(prefix="symptom-bench-")
+    configure_environment(args.mode, stub_url, os.path.join(cache_dir, "cache.sqlite3") if cache_dir else None)
+
+    report = run_benchmark(load_corpus(args.corpus), args.repeat)
+    report["mode"] = args.mode
+
+    regressions = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+    print_report(report, regressions)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
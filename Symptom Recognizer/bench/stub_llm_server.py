@@ -0,0 +1,168 @@
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned responses in the shape each agent expects, chosen from the prompt text
+STUB_RESPONSES = {
+    "doctor_note": {
+        "readable_format": "Patient reports the symptoms below. Please review duration, severity and triggers.",
+        "json_format": {"preparation_date": "2025-01-01", "chief_complaint": "stub"},
+    },
+    "condition_mapper": {
+        "probable_conditions": ["Stub condition A", "Stub condition B"],
+        "suggested_tests": ["Physical exam"],
+        "doctor_specialties": ["Primary care physician"],
+        "urgency_level": "medium",
+    },
+    "interpreter": {
+        "main_symptoms": ["headache"],
+        "duration": "3 days",
+        "severity": "5/10",
+        "body_parts": ["head"],
+        "triggers": "",
+        "timing": "afternoon",
+        "associated_symptoms": ["nausea"],
+    },
+}
+
+
+def pick_response(messages):
+    """Choose a canned response for the agent that sent these messages"""
+    text = " ".join(str(message.get("content", "")) for message in messages).lower()
+    if "doctor" in text and ("note" in text or "summary" in text):
+        return STUB_RESPONSES["doctor_note"]
+    if "condition" in text or "urgency" in text:
+        return STUB_RESPONSES["condition_mapper"]
+    return STUB_RESPONSES["interpreter"]
+
+
+class StubSettings:
+    """Latency and throttling behaviour shared by all handler threads"""
+
+    def __init__(self, latency_ms=400.0, jitter_ms=150.0, rate_per_second=5.0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate = rate_per_second
+        self.error_rate = error_rate
+        self.tokens = float(max(1.0, rate_per_second))
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "throttled": 0, "errors": 0}
+
+    def admit(self):
+        """Token bucket: False when the simulated account is over its rate limit"""
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def delay(self):
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+
+
+def make_handler(settings):
+    class StubLLMHandler(BaseHTTPRequestHandler):
+        """OpenAI-compatible endpoints served under Groq's /openai/v1 prefix"""
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": "stub-model", "object": "model"}]})
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with settings.lock:
+                settings.counts["requests"] += 1
+
+            if not settings.admit():
+                with settings.lock:
+                    settings.counts["throttled"] += 1
+                self._send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+                                {"retry-after": "1"})
+                return
+
+            time.sleep(settings.delay())
+            if random.random() < settings.error_rate:
+                with settings.lock:
+                    settings.counts["errors"] += 1
+                self._send_json(503, {"error": {"message": "Service unavailable (stub)"}})
+                return
+
+            messages = request.get("messages", [])
+            content = json.dumps(pick_response(messages))
+            prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in messages)
+            completion_tokens = len(content.split())
+            self._send_json(200, {
+                "id": f"chatcmpl-stub-{settings.counts['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub-model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+    return StubLLMHandler
+
+
+def start_stub_server(host="127.0.0.1", port=0, **settings_kwargs):
+    """Start the stub in a background thread; returns (server, base_url)"""
+    settings = StubSettings(**settings_kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(settings))
+    server.settings = settings
+    threading.Thread(target=server.serve_forever, name="stub-llm-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Groq-compatible stub with simulated latency and throttling")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=150.0, help="Latency standard deviation")
+    parser.add_argument("--rate", type=float, default=5.0, help="Requests per second before 429s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args(argv)
+
+    server, base_url = start_stub_server(
+        args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        rate_per_second=args.rate, error_rate=args.error_rate
+    )
+    print(f"Stub LLM server listening on {base_url} (set GROQ_BASE_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Stub stats: {server.settings.counts}")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
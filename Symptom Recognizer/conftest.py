@@ -0,0 +1 @@
+# Lets pytest import the app's packages (utils, bench) when run from this directory
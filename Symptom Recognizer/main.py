@@ -1,11 +1,14 @@
 
 import os
+import sys
+import argparse
 from dotenv import load_dotenv
-import json
-from agents.symptom_interpreter import SymptomInterpreterAgent
-from agents.condition_mapper import ConditionMapperAgent
-from agents.doctor_note import DoctorNoteAgent
-from crewai import Crew, Task
+from utils.symptom_cache import SymptomCache
+from utils.condition_index import ConditionIndex
+from utils.symptom_pipeline import build_symptom_pipeline
+from utils.batch_runner import run_batch
+from utils.llm_transport import get_transport
+from utils.json_extract import extract_json
 
 # Load environment variables
 load_dotenv()
@@ -16,65 +19,83 @@ LANGFUSE_PUBLIC_KEY = os.environ.get('Langfuse_publickey')
 GROQ_API_KEY = os.environ.get('Groq_key')
 OPENAI_API_KEY = os.environ.get('OpenAI_key')
 
-# Verify keys are loaded
-if not all([LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY, GROQ_API_KEY]):
-    print("Warning: Some API keys are missing from environment variables")
-    print(f"LANGFUSE_SECRET_KEY: {'✓' if LANGFUSE_SECRET_KEY else '✗'}")
-    print(f"LANGFUSE_PUBLIC_KEY: {'✓' if LANGFUSE_PUBLIC_KEY else '✗'}")
-    print(f"GROQ_API_KEY: {'✓' if GROQ_API_KEY else '✗'}")
-    exit(1)
-else:
+def check_api_keys():
+    """Verify keys are loaded; exits when any are missing (called by entry points, not at import)"""
+    if not all([LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY, GROQ_API_KEY]):
+        print("Warning: Some API keys are missing from environment variables")
+        print(f"LANGFUSE_SECRET_KEY: {'✓' if LANGFUSE_SECRET_KEY else '✗'}")
+        print(f"LANGFUSE_PUBLIC_KEY: {'✓' if LANGFUSE_PUBLIC_KEY else '✗'}")
+        print(f"GROQ_API_KEY: {'✓' if GROQ_API_KEY else '✗'}")
+        sys.exit(1)
     print("All API keys loaded successfully!")
 
+STAGE_LABELS = {
+    "interpret": "Symptoms interpreted and structured",
+    "map_conditions": "Potential areas identified",
+    "doctor_note": "Doctor visit summary created",
+}
+
 class SymptomCheckerCrew:
     def __init__(self):
         """Initialize the Symptom Checker Crew with all agents"""
-        self.symptom_interpreter = SymptomInterpreterAgent(
+        # Agent modules pull in crewai and the LLM SDKs; import them only when a crew is built
+        from agents.symptom_interpreter import SymptomInterpreterAgent
+        from agents.condition_mapper import ConditionMapperAgent
+        from agents.doctor_note import DoctorNoteAgent
+        
+        # All agents share one pooled Groq connection and one Langfuse exporter
+        self.transport = get_transport(GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY)
+        self.symptom_interpreter = self.transport.attach(SymptomInterpreterAgent(
             GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY
-        )
-        self.condition_mapper = ConditionMapperAgent(
+        ))
+        self.condition_mapper = self.transport.attach(ConditionMapperAgent(
             GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY
-        )
-        self.doctor_note_agent = DoctorNoteAgent(
+        ))
+        self.doctor_note_agent = self.transport.attach(DoctorNoteAgent(
             GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY
-        )
+        ))
+        self.cache = SymptomCache()
+        self.condition_index = ConditionIndex.load()
     
-    def process_symptoms(self, user_input):
+    def process_symptoms(self, user_input, verbose=True):
         """Process user symptoms through the entire agent pipeline"""
-        print(f"\n{'='*50}")
-        print("SYMPTOM CHECKER & DOCTOR PREP BOT")
-        print(f"{'='*50}")
+        log = print if verbose else (lambda *args, **kwargs: None)
         
-        try:
-            # Step 1: Interpret symptoms
-            print("\n🔍 Step 1: Interpreting symptoms...")
-            structured_symptoms = self.symptom_interpreter.process_symptoms(user_input)
-            print("✓ Symptoms interpreted and structured")
-            
-            # Step 2: Map to potential conditions
-            print("\n🗺️  Step 2: Mapping to potential areas of concern...")
-            mapped_conditions = self.condition_mapper.map_conditions(structured_symptoms)
-            print("✓ Potential areas identified")
-            
-            # Step 3: Create doctor note
-            print("\n📋 Step 3: Creating doctor visit summary...")
-            doctor_note = self.doctor_note_agent.create_doctor_note(
-                structured_symptoms, mapped_conditions
-            )
-            print("✓ Doctor visit summary created")
-            
-            # Display results
+        log(f"\n{'='*50}")
+        log("SYMPTOM CHECKER & DOCTOR PREP BOT")
+        log(f"{'='*50}")
+        
+        # Stages run as a DAG with per-stage caching, retries and timeouts
+        log("\n🔍 Interpreting symptoms, mapping areas of concern and creating the doctor visit summary...")
+        # Built per call so stage retry messages follow the verbose flag
+        pipeline = build_symptom_pipeline(
+            self.symptom_interpreter, self.condition_mapper, self.doctor_note_agent,
+            cache=self.cache, condition_index=self.condition_index, log=log
+        )
+        result = pipeline.run(user_input=user_input, form_fields=None)
+        for name, report in result.stages.items():
+            if report.status == "ok":
+                cached = ", cached" if report.cached else ""
+                log(f"✓ {STAGE_LABELS[name]} ({report.seconds:.1f}s{cached})")
+        
+        if result.error:
+            log(f"❌ Error in processing: {result.error}")
+            return {"error": result.error, "timings": result.timings}
+        
+        structured_symptoms = result["structured_symptoms"]
+        mapped_conditions = result["mapped_conditions"]
+        doctor_note = result["doctor_note"]
+        
+        # Display results
+        if verbose:
             self.display_results(structured_symptoms, mapped_conditions, doctor_note)
-            
-            return {
-                "structured_symptoms": structured_symptoms,
-                "mapped_conditions": mapped_conditions,
-                "doctor_note": doctor_note
-            }
-            
-        except Exception as e:
-            print(f"❌ Error in processing: {str(e)}")
-            return {"error": str(e)}
+        
+        return {
+            "structured_symptoms": structured_symptoms,
+            "mapped_conditions": mapped_conditions,
+            "doctor_note": doctor_note,
+            "timings": result.timings
+        }
     
     def display_results(self, symptoms, conditions, note):
         """Display the results in a formatted way"""
@@ -84,44 +105,32 @@ class SymptomCheckerCrew:
         
         print("\n📊 STRUCTURED SYMPTOMS:")
         print("-" * 30)
-        try:
-            if isinstance(symptoms, str):
-                symptoms_json = json.loads(symptoms)
-                for key, value in symptoms_json.items():
-                    print(f"{key.replace('_', ' ').title()}: {value}")
-            else:
-                print(symptoms)
-        except:
-            print(symptoms)
+        self._print_fields(symptoms)
         
         print("\n🏥 POTENTIAL AREAS OF CONCERN:")
         print("-" * 35)
-        try:
-            if isinstance(conditions, str):
-                conditions_json = json.loads(conditions)
-                for key, value in conditions_json.items():
-                    print(f"{key.replace('_', ' ').title()}: {value}")
-            else:
-                print(conditions)
-        except:
-            print(conditions)
+        self._print_fields(conditions)
         
         print("\n📋 DOCTOR VISIT SUMMARY:")
         print("-" * 30)
-        try:
-            if isinstance(note, str):
-                note_json = json.loads(note)
-                if 'readable_format' in note_json:
-                    print(note_json['readable_format'])
-                else:
-                    print(note)
-            else:
-                print(note)
-        except:
+        note_json = extract_json(note)
+        if note_json is not None and 'readable_format' in note_json:
+            print(note_json['readable_format'])
+        else:
             print(note)
+    
+    def _print_fields(self, output):
+        """Print each field of an agent's JSON output, or the raw output if it has none"""
+        output_json = extract_json(output)
+        if output_json is None:
+            print(output)
+            return
+        for key, value in output_json.items():
+            print(f"{key.replace('_', ' ').title()}: {value}")
 
 def main():
     """Main application entry point"""
+    check_api_keys()
     crew = SymptomCheckerCrew()
     
     print("Welcome to the Symptom Checker & Doctor Prep Bot!")
@@ -148,7 +157,42 @@ def main():
         if continue_choice not in ['y', 'yes']:
             break
     
+    metrics = crew.cache.metrics()
+    print(f"\nCache: {metrics['hits']} hits / {metrics['misses']} misses "
+          f"({metrics['hit_ratio']:.0%} hit ratio, {metrics['saved_seconds']:.1f}s saved)")
     print("\nRemember to share your summary with your healthcare provider!")
+    crew.transport.close()
+
+def batch_main(argv):
+    """Batch entry point: run a JSONL file of symptom descriptions through the pipeline"""
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="Run symptom descriptions from a JSONL file through the agent pipeline"
+    )
+    parser.add_argument("input", help="JSONL file with one {\"id\": ..., \"symptoms\": ...} record per line")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Maximum records processed at once")
+    parser.add_argument("-r", "--rate", type=float, default=2.0, help="Maximum records started per second (0 = unlimited)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run records that failed in a previous run")
+    args = parser.parse_args(argv)
+    
+    check_api_keys()
+    crew = SymptomCheckerCrew()
+    run_batch(
+        crew, args.input, args.output,
+        concurrency=args.concurrency,
+        rate_per_second=args.rate,
+        checkpoint_path=args.checkpoint,
+        retry_failed=args.retry_failed
+    )
+    crew.transport.close()
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "profile-startup":
+        from utils.startup_profile import main as profile_main
+        profile_main(sys.argv[2:])
+    else:
+        main()
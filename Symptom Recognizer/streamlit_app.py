@@ -1,10 +1,11 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import json
-from agents.symptom_interpreter import SymptomInterpreterAgent
-from agents.condition_mapper import ConditionMapperAgent
-from agents.doctor_note import DoctorNoteAgent
+from utils.symptom_cache import SymptomCache
+from utils.condition_index import ConditionIndex
+from utils.symptom_pipeline import build_symptom_pipeline
+from utils.llm_transport import get_transport
+from utils.results import AnalysisResult
 
 # Load environment variables
 load_dotenv()
@@ -31,69 +32,73 @@ if 'processing' not in st.session_state:
 
 @st.cache_resource
 def initialize_agents():
-    """Initialize the agents (cached for performance)"""
-    if not all([LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY, GROQ_API_KEY]):
-        st.error("⚠️ Missing API keys. Please check your environment variables.")
-        st.stop()
+    """Initialize the agents (cached for performance)
+    
+    Called on the first analysis rather than at page load; the agent modules
+    pull in crewai and the LLM SDKs, which dominate cold-start time.
+    """
+    from agents.symptom_interpreter import SymptomInterpreterAgent
+    from agents.condition_mapper import ConditionMapperAgent
+    from agents.doctor_note import DoctorNoteAgent
     
-    symptom_interpreter = SymptomInterpreterAgent(
+    # All agents share one pooled Groq connection and one Langfuse exporter
+    transport = get_transport(GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY)
+    
+    symptom_interpreter = transport.attach(SymptomInterpreterAgent(
         GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY
-    )
-    condition_mapper = ConditionMapperAgent(
+    ))
+    condition_mapper = transport.attach(ConditionMapperAgent(
         GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY
-    )
-    doctor_note_agent = DoctorNoteAgent(
+    ))
+    doctor_note_agent = transport.attach(DoctorNoteAgent(
         GROQ_API_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY
-    )
+    ))
     
     return symptom_interpreter, condition_mapper, doctor_note_agent
 
-def process_symptoms(user_input, symptom_interpreter, condition_mapper, doctor_note_agent):
+@st.cache_resource
+def initialize_cache():
+    """Open the persistent symptom cache (shared across sessions)"""
+    return SymptomCache()
+
+@st.cache_resource
+def initialize_condition_index():
+    """Load the memory-mapped symptom-to-condition index (cached for performance)"""
+    return ConditionIndex.load()
+
+def process_symptoms(user_input, symptom_interpreter, condition_mapper, doctor_note_agent,
+                     cache=None, form_fields=None, condition_index=None):
     """Process user symptoms through the entire agent pipeline"""
     try:
-        # Step 1: Interpret symptoms
-        structured_symptoms = symptom_interpreter.process_symptoms(user_input)
-        
-        # Step 2: Map to potential conditions
-        mapped_conditions = condition_mapper.map_conditions(structured_symptoms)
-        
-        # Step 3: Create doctor note
-        doctor_note = doctor_note_agent.create_doctor_note(
-            structured_symptoms, mapped_conditions
+        # Guided form input is already structured, so the interpret stage skips the
+        # interpreter round-trip; mapping is grounded by the local index and cached
+        # by the structured symptom fingerprint
+        pipeline = build_symptom_pipeline(
+            symptom_interpreter, condition_mapper, doctor_note_agent,
+            cache=cache, condition_index=condition_index
         )
+        result = pipeline.run(user_input=user_input, form_fields=form_fields)
+        if result.error:
+            return {"error": result.error, "success": False, "timings": result.timings}
         
         return {
-            "structured_symptoms": structured_symptoms,
-            "mapped_conditions": mapped_conditions,
-            "doctor_note": doctor_note,
+            "structured_symptoms": result["structured_symptoms"],
+            "mapped_conditions": result["mapped_conditions"],
+            "doctor_note": result["doctor_note"],
+            "timings": result.timings,
             "success": True
         }
         
     except Exception as e:
         return {"error": str(e), "success": False}
 
-def parse_json_safely(json_string):
-    """Safely parse JSON from agent responses"""
-    try:
-        if isinstance(json_string, str):
-            # Remove markdown code blocks if present
-            if '```json' in json_string:
-                json_string = json_string.split('```json')[1].split('```')[0].strip()
-            elif '```' in json_string:
-                json_string = json_string.split('```')[1].split('```')[0].strip()
-            
-            return json.loads(json_string)
-        return json_string
-    except:
-        return json_string
-
-def display_results(results):
-    """Display the results in a formatted way"""
+def display_results(result):
+    """Display a parsed AnalysisResult (no parsing happens here, so reruns stay cheap)"""
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 Structured Symptoms")
-        symptoms = parse_json_safely(results['structured_symptoms'])
+        symptoms = result.symptoms.display
         if isinstance(symptoms, dict):
             for key, value in symptoms.items():
                 if value:  # Only show non-empty values
@@ -102,7 +107,7 @@ def display_results(results):
             st.write(symptoms)
         
         st.subheader("🏥 Medical Considerations")
-        conditions = parse_json_safely(results['mapped_conditions'])
+        conditions = result.conditions.display
         if isinstance(conditions, dict):
             # Priority display for key medical information
             priority_fields = ['urgency_level', 'probable_conditions', 'suggested_tests', 'doctor_specialties']
@@ -138,36 +143,22 @@ def display_results(results):
     
     with col2:
         st.subheader("📋 Doctor Visit Summary")
-        note = parse_json_safely(results['doctor_note'])
-        if isinstance(note, dict) and 'readable_format' in note:
-            st.write(note['readable_format'])
+        note = result.note.data
+        if result.readable_note is not None:
+            st.write(result.readable_note)
             
             # Show JSON format in an expandable section
             with st.expander("View Detailed JSON Summary"):
                 if 'json_format' in note:
                     st.json(note['json_format'])
         else:
-            st.write(note)
+            st.write(result.note.display)
         
-        # Download button for the summary
-        if isinstance(note, dict) and 'readable_format' in note:
-            summary_text = f"""
-SYMPTOM CHECKER & DOCTOR PREP BOT - VISIT SUMMARY
-Generated on: {note.get('json_format', {}).get('preparation_date', 'N/A')}
-
-{note['readable_format']}
-
-STRUCTURED SYMPTOMS:
-{json.dumps(symptoms, indent=2) if isinstance(symptoms, dict) else symptoms}
-
-POTENTIAL AREAS OF CONCERN:
-{json.dumps(conditions, indent=2) if isinstance(conditions, dict) else conditions}
-
-DISCLAIMER: This is NOT a medical diagnosis. Always consult healthcare professionals.
-"""
+        # Download button for the summary (text is rendered once and memoized)
+        if result.summary_text is not None:
             st.download_button(
                 label="📥 Download Summary",
-                data=summary_text,
+                data=result.summary_text,
                 file_name="symptom_summary.txt",
                 mime="text/plain"
             )
@@ -203,13 +194,19 @@ def main():
     3. **Doctor Note Creation**: Generates a professional summary for your visit
     """)
     
-    # Initialize agents
-    try:
-        symptom_interpreter, condition_mapper, doctor_note_agent = initialize_agents()
-        st.sidebar.success("✅ System initialized successfully!")
-    except Exception as e:
-        st.error(f"❌ Failed to initialize: {str(e)}")
+    # Agents are constructed on the first analysis; only check configuration here
+    if not all([LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY, GROQ_API_KEY]):
+        st.error("⚠️ Missing API keys. Please check your environment variables.")
         st.stop()
+    st.sidebar.success("✅ System ready!")
+    
+    cache = initialize_cache()
+    condition_index = initialize_condition_index()
+    cache_metrics = cache.metrics()
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Cache")
+    st.sidebar.metric("Hit ratio", f"{cache_metrics['hit_ratio']:.0%}")
+    st.sidebar.metric("Latency saved", f"{cache_metrics['saved_seconds']:.1f}s")
     
     # Main input area
     st.subheader("Describe Your Symptoms")
@@ -222,6 +219,7 @@ def main():
     )
     
     user_input = ""
+    form_fields = None
     
     if input_method == "Text Description":
         user_input = st.text_area(
@@ -249,21 +247,30 @@ def main():
         associated_symptoms = st.text_area("Other symptoms:")
         
         if main_symptom:
-            user_input = f"""
-            Main symptom: {main_symptom}
-            Duration: {duration}
-            Severity: {severity}/10
-            Affected areas: {', '.join(affected_areas)}
-            Triggers: {triggers}
-            Timing: {timing}
-            Associated symptoms: {associated_symptoms}
-            """
+            user_input = main_symptom
+            form_fields = {
+                "main_symptom": main_symptom,
+                "duration": duration,
+                "severity": severity,
+                "affected_areas": affected_areas,
+                "triggers": triggers,
+                "timing": timing,
+                "associated_symptoms": associated_symptoms,
+            }
     
     # Process button
     if st.button("🔍 Analyze Symptoms", type="primary", disabled=not user_input.strip()):
         if user_input.strip():
             st.session_state.processing = True
             
+            # Initialize agents (only slow on the first analysis in this process)
+            try:
+                with st.spinner("Starting AI agents..."):
+                    symptom_interpreter, condition_mapper, doctor_note_agent = initialize_agents()
+            except Exception as e:
+                st.error(f"❌ Failed to initialize: {str(e)}")
+                st.stop()
+            
             # Progress bar
             progress_bar = st.progress(0)
             status_text = st.empty()
@@ -272,7 +279,10 @@ def main():
             status_text.text("🔍 Step 1: Interpreting symptoms...")
             progress_bar.progress(33)
             
-            results = process_symptoms(user_input, symptom_interpreter, condition_mapper, doctor_note_agent)
+            results = process_symptoms(
+                user_input, symptom_interpreter, condition_mapper, doctor_note_agent,
+                cache=cache, form_fields=form_fields, condition_index=condition_index
+            )
             
             status_text.text("🗺️ Step 2: Mapping to potential areas...")
             progress_bar.progress(66)
@@ -285,7 +295,8 @@ def main():
             status_text.empty()
             
             if results['success']:
-                st.session_state.results = results
+                # Parse once here; reruns reuse the typed record from session state
+                st.session_state.results = AnalysisResult.from_results(results)
                 st.success("✅ Analysis complete!")
             else:
                 st.error(f"❌ Error: {results.get('error', 'Unknown error occurred')}")
@@ -293,7 +304,7 @@ def main():
             st.session_state.processing = False
     
     # Display results
-    if st.session_state.results and st.session_state.results['success']:
+    if st.session_state.results is not None:
         st.markdown("---")
         st.subheader("📋 Analysis Results")
         display_results(st.session_state.results)
@@ -0,0 +1,55 @@
+import json
+from utils.batch_runner import read_records, run_batch, percentile
+
+
+class FakeCrew:
+    def __init__(self):
+        self.calls = []
+
+    def process_symptoms(self, text, verbose=True):
+        self.calls.append(text)
+        if "fail" in text:
+            return {"error": "interpret: boom", "timings": {"interpret": 0.1, "total": 0.1}}
+        return {"structured_symptoms": "{}", "timings": {"interpret": 0.1, "map_conditions": 0.2, "total": 0.3}}
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_read_records_coerces_non_string_fields(tmp_path):
+    path = write_lines(tmp_path / "in.jsonl", [
+        '{"id": 7, "symptoms": ["cough", "fever"]}',
+        '{"text": 42}',
+        '"headache for 2 days"',
+        '[1, 2]',
+        'not json',
+        '{"symptoms": {"main": "rash"}}',
+    ])
+    assert list(read_records(path)) == [
+        ("7", "cough, fever"), ("2", "42"), ("3", "headache for 2 days"),
+        ("4", ""), ("5", ""), ("6", '{"main": "rash"}'),
+    ]
+
+
+def test_run_batch_writes_results_and_resumes_from_checkpoint(tmp_path):
+    path = write_lines(tmp_path / "in.jsonl", [
+        '{"id": "a", "symptoms": "cough"}', '{"id": "b", "symptoms": "fail please"}', '{"id": "c", "symptoms": 5}',
+    ])
+    output = str(tmp_path / "out.jsonl")
+    crew = FakeCrew()
+    summary = run_batch(crew, path, output, concurrency=2, rate_per_second=0)
+    assert (summary["completed"], summary["failed"]) == (2, 1)
+    statuses = {row["id"]: row["status"] for row in map(json.loads, open(output, encoding="utf-8"))}
+    assert statuses == {"a": "ok", "b": "error", "c": "ok"}
+
+    crew = FakeCrew()
+    run_batch(crew, path, output, rate_per_second=0, retry_failed=True)
+    assert crew.calls == ["fail please"]
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(list(range(1, 101)), 0.95) == 95
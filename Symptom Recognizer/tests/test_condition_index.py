@@ -0,0 +1,64 @@
+import json
+import threading
+import pytest
+from utils.condition_index import ConditionIndex, build_index, parse_duration_days, DEFAULT_DATASET_PATH
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("index") / "condition_index.bin")
+    index = ConditionIndex(build_index(DEFAULT_DATASET_PATH, path))
+    yield index
+    index.close()
+
+
+def structured(**fields):
+    return json.dumps({"main_symptoms": ["sore throat", "runny nose", "sneezing"], "severity": "3/10", **fields})
+
+
+@pytest.mark.parametrize("text, days", [
+    ("1-3 days", 3), ("Less than 1 day", 1), ("More than 2 weeks", 15), ("a couple of days", 2),
+    ("since yesterday", 1), ("two weeks", 14), ("", None), ("on and off", None), ("extra day", None),
+])
+def test_parse_duration_days(text, days):
+    assert parse_duration_days(text) == days
+
+
+def test_common_cold_is_answered_locally_when_short(index):
+    match = index.match_structured(structured(duration="1-3 days"))
+    assert match.top["name"] == "Common cold"
+    assert match.can_answer_locally()
+
+
+def test_unknown_or_long_duration_goes_to_the_model(index):
+    assert not index.match_structured(structured()).can_answer_locally()
+    assert not index.match_structured(structured(duration="More than 2 weeks")).can_answer_locally()
+
+
+def test_red_flags_in_any_field_go_to_the_model(index):
+    for fields in [{"triggers": "worse with chest pain when climbing stairs"},
+                   {"timing": "at night, with shortness of breath"},
+                   {"notes": "I felt short of breath"}]:
+        match = index.match_structured(structured(duration="1-3 days", **fields))
+        assert match.red_flags
+        assert not match.can_answer_locally()
+
+
+def test_concurrent_rebuilds_leave_a_valid_index(tmp_path):
+    path = str(tmp_path / "condition_index.bin")
+    errors = []
+
+    def rebuild():
+        try:
+            build_index(DEFAULT_DATASET_PATH, path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rebuild) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert [name for name in tmp_path.iterdir()] == [tmp_path / "condition_index.bin"]
+    ConditionIndex(path).close()
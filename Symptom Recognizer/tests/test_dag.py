@@ -0,0 +1,92 @@
+import time
+import threading
+import pytest
+from utils.dag import MemoryCache, Pipeline, PipelineError, Stage, StageTimeout
+
+
+def fail(**kwargs):
+    raise RuntimeError("boom")
+
+
+def test_independent_stages_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_other(text):
+        barrier.wait()
+        return text.upper()
+
+    pipeline = Pipeline([
+        Stage("a", wait_for_other, inputs={"text": str}),
+        Stage("b", wait_for_other, inputs={"text": str}),
+        Stage("c", lambda a, b: a + b, inputs={"a": str, "b": str}),
+    ])
+    result = pipeline.run(text="x")
+    assert result["c"] == "XX"
+    assert result.error is None
+
+
+def test_failed_stage_skips_dependents_reached_through_two_paths():
+    # a -> b, (a, b) -> c: c is skipped through b before the loop over a's dependents reaches it
+    pipeline = Pipeline([
+        Stage("a", fail, inputs={"text": str}),
+        Stage("b", lambda a: a, inputs={"a": object}),
+        Stage("c", lambda a, b: a + b, inputs={"a": object, "b": object}),
+    ])
+    result = pipeline.run(text="x")
+    assert result.stages["a"].status == "failed"
+    assert result.stages["b"].status == "skipped"
+    assert result.stages["c"].status == "skipped"
+    assert result.error == "a: boom"
+
+
+def test_retries_then_fallback():
+    calls = []
+
+    def flaky(text):
+        calls.append(text)
+        raise RuntimeError("upstream 500")
+
+    stage = Stage("a", flaky, inputs={"text": str}, retries=2, retry_delay=0,
+                  fallback=lambda error, text: f"fallback: {error}")
+    result = Pipeline([stage]).run(text="x")
+    assert len(calls) == 3
+    assert result["a"] == "fallback: upstream 500"
+    assert result.stages["a"].status == "fallback"
+
+
+def test_timed_out_stage_is_not_retried():
+    calls = []
+
+    def slow(text):
+        calls.append(text)
+        time.sleep(0.3)
+        return text
+
+    result = Pipeline([Stage("a", slow, inputs={"text": str}, timeout=0.05, retries=2, retry_delay=0)]).run(text="x")
+    assert calls == ["x"]
+    assert result.stages["a"].attempts == 1
+    assert "timed out" in result.error
+    # The abandoned call is still running until its sleep ends
+    assert len(result.abandoned_calls) == 1
+    result.abandoned[0].join()
+    assert result.abandoned_calls == []
+
+
+def test_cached_stage_runs_once():
+    calls = []
+    stage = Stage("a", lambda text: calls.append(text) or text * 2, inputs={"text": str},
+                  cache_key=lambda text: text)
+    pipeline = Pipeline([stage], cache=MemoryCache())
+    pipeline.run(text="x")
+    result = pipeline.run(text="x")
+    assert calls == ["x"]
+    assert result.stages["a"].cached
+
+
+def test_invalid_pipelines_are_rejected():
+    with pytest.raises(PipelineError):
+        Pipeline([Stage("a", fail, inputs={"b": str}), Stage("b", fail, inputs={"a": str})])
+    with pytest.raises(PipelineError):
+        Pipeline([Stage("a", fail), Stage("b", fail, output="a")])
+    with pytest.raises(PipelineError):
+        Pipeline([Stage("a", fail, inputs={"text": str})]).run()
@@ -0,0 +1,38 @@
+import json
+from utils.guided_form import build_structured_symptoms
+
+
+class FakeInterpreter:
+    def __init__(self, output):
+        self.output = output
+        self.calls = []
+
+    def process_symptoms(self, text):
+        self.calls.append(text)
+        return self.output
+
+
+def test_form_fields_skip_the_interpreter():
+    interpreter = FakeInterpreter("unused")
+    structured = json.loads(build_structured_symptoms({
+        "main_symptom": "Headache", "duration": "2-3 days", "severity": 6,
+        "affected_areas": ["Head"], "triggers": "", "timing": "Morning",
+    }, interpreter))
+    assert structured["main_symptoms"] == ["Headache"]
+    assert structured["severity"] == "6/10"
+    assert structured["associated_symptoms"] == []
+    assert interpreter.calls == []
+
+
+def test_other_symptoms_go_through_the_interpreter():
+    interpreter = FakeInterpreter('```json\n{"main_symptoms": ["nausea"], "associated_symptoms": ["dizziness"]}\n```')
+    structured = json.loads(build_structured_symptoms(
+        {"main_symptom": "Headache", "associated_symptoms": "feeling queasy and dizzy"}, interpreter
+    ))
+    assert structured["associated_symptoms"] == ["nausea", "dizziness"]
+    assert interpreter.calls == ["feeling queasy and dizzy"]
+
+
+def test_other_symptoms_are_split_without_an_interpreter():
+    structured = json.loads(build_structured_symptoms({"associated_symptoms": "nausea, dizziness and fatigue"}))
+    assert structured["associated_symptoms"] == ["nausea", "dizziness", "fatigue"]
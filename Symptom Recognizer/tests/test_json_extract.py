@@ -0,0 +1,40 @@
+from utils.json_extract import extract_json, iter_json_objects
+
+
+def test_plain_and_dict_input():
+    assert extract_json('{"a": 1}') == {"a": 1}
+    assert extract_json({"a": 1}) == {"a": 1}
+    assert extract_json(None) is None
+    assert extract_json("no json here") is None
+
+
+def test_fenced_block_with_prose():
+    text = 'Here is the result:\n```json\n{"a": 1, "b": [1, 2]}\n```\nLet me know.'
+    assert extract_json(text) == {"a": 1, "b": [1, 2]}
+
+
+def test_unbalanced_brace_in_prose_before_the_object():
+    text = 'Use a {placeholder here.\n```json\n{"a": 1, "b": [1,2]}\n```'
+    assert extract_json(text, partial=False) == {"a": 1, "b": [1, 2]}
+    assert extract_json(text) == {"a": 1, "b": [1, 2]}
+
+
+def test_braces_inside_strings_and_prose():
+    text = 'Set {x} first. {"note": "use } and { freely", "n": 2} done {y}'
+    assert extract_json(text) == {"note": "use } and { freely", "n": 2}
+
+
+def test_largest_object_wins():
+    assert extract_json('{"a": 1} then {"a": 1, "b": 2}') == {"a": 1, "b": 2}
+    assert list(iter_json_objects('{"a": 1} {bad} {"b": 2}')) == [{"a": 1}, {"b": 2}]
+
+
+def test_truncated_output():
+    text = '```json\n{"main_symptoms": ["headache", "nausea"], "duration": "2 da'
+    assert extract_json(text) == {"main_symptoms": ["headache", "nausea"], "duration": "2 da"}
+    assert extract_json(text, partial=False) is None
+    assert extract_json('{"a": [1, 2, {"b": ') == {"a": [1, 2]}
+
+
+def test_truncated_output_after_a_prose_brace():
+    assert extract_json('Use a {placeholder. {"a": 1, "b": "cut') == {"a": 1, "b": "cut"}
@@ -0,0 +1,48 @@
+import json
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from utils.llm_replay import LLMFixtureTransport, FixtureMissingError, fixture_key
+
+
+def body(content):
+    return json.dumps({"model": "m", "messages": [{"role": "user", "content": content}]}).encode()
+
+
+def test_fixture_key_ignores_timestamps_and_ids():
+    first = fixture_key("POST", "/v1/chat", body("at 2026-10-19T09:18:25Z, id 123e4567-e89b-12d3-a456-426614174000"))
+    second = fixture_key("POST", "/v1/chat", body("at 2025-01-02T10:00:01Z, id 00000000-0000-0000-0000-000000000000"))
+    assert first == second
+
+
+def test_fixture_key_keeps_clock_times_and_dates_from_symptoms():
+    assert fixture_key("POST", "/v1/chat", body("woke at 3:00 with pain")) != \
+        fixture_key("POST", "/v1/chat", body("woke at 5:30 with pain"))
+    assert fixture_key("POST", "/v1/chat", body("since 2026-10-01")) != \
+        fixture_key("POST", "/v1/chat", body("since 2026-09-01"))
+
+
+class UpstreamTransport(httpx.BaseTransport):
+    def __init__(self):
+        self.calls = 0
+
+    def handle_request(self, request):
+        self.calls += 1
+        return httpx.Response(200, json={"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2,
+                                                                   "total_tokens": 5}})
+
+
+def test_record_then_replay(tmp_path):
+    upstream = UpstreamTransport()
+    with httpx.Client(transport=LLMFixtureTransport(upstream, "record", str(tmp_path))) as client:
+        client.post("https://api.groq.com/v1/chat", content=body("headache"))
+    assert upstream.calls == 1
+
+    replay = LLMFixtureTransport(UpstreamTransport(), "replay", str(tmp_path))
+    with httpx.Client(transport=replay) as client:
+        response = client.post("https://api.groq.com/v1/chat", content=body("headache"))
+        assert response.json()["usage"]["total_tokens"] == 5
+        with pytest.raises(FixtureMissingError):
+            client.post("https://api.groq.com/v1/chat", content=body("cough"))
+    assert replay.usage["replayed"] == 1 and replay.usage["total_tokens"] == 5
@@ -0,0 +1,39 @@
+import pytest
+
+groq = pytest.importorskip("groq")
+pytest.importorskip("httpx")
+pytest.importorskip("langfuse")
+
+from utils.llm_transport import LLMTransport
+
+
+class ClientAgent:
+    def __init__(self):
+        self.client = groq.Groq(api_key="test-key")
+
+
+class WrapperAgent:
+    def __init__(self):
+        self.llm = "groq/llama-3.1-8b-instant"
+
+
+def make_transport():
+    transport = LLMTransport.__new__(LLMTransport)
+    transport.groq = groq.Groq(api_key="test-key")
+    transport.langfuse = None
+    transport.attached = {}
+    return transport
+
+
+def test_attach_swaps_groq_clients():
+    transport = make_transport()
+    agent = transport.attach(ClientAgent())
+    assert agent.client is transport.groq
+    assert transport.attached == {"ClientAgent": ["client"]}
+
+
+def test_attach_warns_when_nothing_can_be_pooled(capsys):
+    transport = make_transport()
+    transport.attach(WrapperAgent())
+    assert "WrapperAgent" in capsys.readouterr().out
+    assert transport.attached == {"WrapperAgent": []}
@@ -0,0 +1,21 @@
+import os
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(APP_DIR)
+
+
+def test_batch_common_matches_the_pitch_evaluator_copy():
+    other = os.path.join(REPO_DIR, "Startup Evaluator Agent", "pitch_evaluator", "batch_common.py")
+    if not os.path.exists(other):
+        pytest.skip("Startup Evaluator Agent is not checked out next to this app")
+    with open(os.path.join(APP_DIR, "utils", "batch_common.py"), "rb") as f, open(other, "rb") as g:
+        assert f.read() == g.read(), "utils/batch_common.py differs from the Startup Evaluator Agent copy"
+
+
+def test_dag_matches_the_legaleagle_copy():
+    other = os.path.join(REPO_DIR, "LegalEagle AI Legal Document Analyzer", "utils", "dag.py")
+    if not os.path.exists(other):
+        pytest.skip("LegalEagle is not checked out next to this app")
+    with open(os.path.join(APP_DIR, "utils", "dag.py"), "rb") as f, open(other, "rb") as g:
+        assert f.read() == g.read(), "utils/dag.py differs from the LegalEagle copy"
@@ -0,0 +1,41 @@
+import json
+from utils.startup_profile import build_report, main, parse_importtime
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   stub_child
+import time:     50210 |      50330 | stub_app
+"""
+
+
+def write_stub(tmp_path, monkeypatch):
+    # A module that takes ~50 ms to import and pulls in a child module
+    (tmp_path / "stub_child.py").write_text("VALUE = 1\n")
+    (tmp_path / "stub_app.py").write_text("import time\nimport stub_child\ntime.sleep(0.05)\n")
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    monkeypatch.setenv("SYMPTOM_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+
+
+def test_parse_importtime_rows():
+    assert parse_importtime(IMPORTTIME) == [("stub_child", 120, 120, 1), ("stub_app", 50210, 50330, 0)]
+
+
+def test_report_phases_for_a_stubbed_import(tmp_path, monkeypatch):
+    write_stub(tmp_path, monkeypatch)
+    report = build_report(["stub_app", "not_a_real_module"])
+
+    assert report["interpreter_startup_seconds"] > 0
+    top = {row["module"]: row for row in report["top_cumulative"]}
+    assert top["stub_app"]["cumulative_ms"] >= 50
+    assert report["top_self"][0]["module"] == "stub_app"
+    assert report["total_import_seconds"] >= 0.05
+    assert report["cold_imports"]["stub_app"] >= 0.05
+    assert report["cold_imports"]["not_a_real_module"] is None
+    assert set(report["ready_steps"]) == {"open symptom cache", "load condition index"}
+
+
+def test_profile_startup_json_output(tmp_path, monkeypatch, capsys):
+    write_stub(tmp_path, monkeypatch)
+    main(["stub_app", "--json", "--top", "3"])
+    report = json.loads(capsys.readouterr().out)
+    assert list(report["cold_imports"]) == ["stub_app"]
+    assert len(report["top_self"]) <= 3
@@ -0,0 +1,56 @@
+import time
+from utils.symptom_cache import SymptomCache, symptom_fingerprint, is_error_output
+
+
+def make_cache(tmp_path, **kwargs):
+    return SymptomCache(path=str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_fingerprint_ignores_case_whitespace_and_order():
+    first = symptom_fingerprint({"symptoms": "Head Ache, fever", "duration": "2 days"})
+    second = symptom_fingerprint('{"duration": "2 days", "symptoms": "fever,  headache"}')
+    assert first == second
+
+
+def test_fingerprint_keeps_clinically_distinct_terms_apart():
+    assert symptom_fingerprint("chest tightness") != symptom_fingerprint("chest pain")
+    assert symptom_fingerprint("temperature of 37.5") != symptom_fingerprint("fever of 37.5")
+    assert symptom_fingerprint("tight chest") == symptom_fingerprint("chest tightness")
+
+
+def test_get_or_compute_caches_results(tmp_path):
+    cache = make_cache(tmp_path)
+    calls = []
+    compute = lambda: calls.append(1) or '{"symptoms": ["cough"]}'
+    assert cache.get_or_compute("interpreter", "k", compute) == '{"symptoms": ["cough"]}'
+    assert cache.get_or_compute("interpreter", "k", compute) == '{"symptoms": ["cough"]}'
+    assert len(calls) == 1
+    assert cache.metrics()["hits"] == 1
+
+
+def test_error_outputs_are_not_cached(tmp_path):
+    cache = make_cache(tmp_path)
+    for value in ["Error: rate limit reached", '{"error": "timeout"}', {"error": "boom"}, ""]:
+        assert is_error_output(value)
+        cache.set("interpreter", "k", value)
+        assert cache.get("interpreter", "k") is None
+    assert not is_error_output('{"symptoms": ["no errors reported"]}')
+
+
+def test_explicit_zero_ttl_is_respected(tmp_path, monkeypatch):
+    monkeypatch.setenv("SYMPTOM_CACHE_TTL", "3600")
+    cache = make_cache(tmp_path, ttl_seconds=0)
+    assert cache.ttl_seconds == 0
+    cache.set("interpreter", "k", "value")
+    time.sleep(0.01)
+    assert cache.get("interpreter", "k") is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.set("ns", "a", "1")
+    cache.set("ns", "b", "2")
+    cache.get("ns", "a")
+    cache.set("ns", "c", "3")
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "a") == "1"
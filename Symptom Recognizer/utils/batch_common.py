@@ -0,0 +1,56 @@
+# Batch helpers shared by the Symptom Recognizer batch runner and the pitch
+# evaluator batch runner. Each app is deployed on its own, so the file is kept
+# in both; a test in each app's tests/ fails when the copies drift.
+import os
+import math
+import time
+import threading
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how many calls start per second"""
+
+    def __init__(self, rate_per_second, burst=1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds spent waiting"""
+        if not self.rate:
+            return 0.0
+        started = time.monotonic()
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+            waited = time.monotonic() - started
+
+
+def load_checkpoint(checkpoint_path, retry_failed=False):
+    """Return the ids already processed by a previous (possibly interrupted) run"""
+    statuses = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                item_id, _, status = line.rstrip("\n").partition("\t")
+                if item_id:
+                    statuses[item_id] = status
+    return {item_id for item_id, status in statuses.items() if status == "ok" or not retry_failed}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
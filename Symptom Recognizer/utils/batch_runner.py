@@ -0,0 +1,131 @@
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.batch_common import RateLimiter, load_checkpoint, percentile
+
+# Fields accepted as the symptom description in an input record
+INPUT_TEXT_FIELDS = ["symptoms", "user_input", "text", "description"]
+
+STAGES = ["interpret", "map_conditions", "doctor_note", "total"]
+
+
+def _record_text(record):
+    """The symptom description of a record as a string (lists are joined, numbers converted)"""
+    text = next((record[field] for field in INPUT_TEXT_FIELDS if record.get(field)), "")
+    if isinstance(text, (list, tuple)):
+        return ", ".join(str(item) for item in text if item is not None)
+    if isinstance(text, dict):
+        return json.dumps(text)
+    return str(text)
+
+
+def read_records(input_path):
+    """Yield (record_id, text) pairs from a JSONL file of symptom descriptions"""
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if isinstance(record, str):
+                record = {"symptoms": record}
+            if not isinstance(record, dict):
+                print(f"Line {line_number}: expected a JSON object or string, skipping")
+                yield str(line_number), ""
+                continue
+            yield str(record.get("id", line_number)), _record_text(record)
+
+
+def summarize(timings, completed, failed, elapsed):
+    """Build throughput and per-stage latency statistics"""
+    stages = {}
+    for stage in STAGES:
+        values = timings.get(stage, [])
+        if values:
+            stages[stage] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "max": max(values),
+            }
+    return {
+        "completed": completed,
+        "failed": failed,
+        "elapsed_seconds": elapsed,
+        "throughput_per_minute": (completed + failed) / elapsed * 60 if elapsed else 0.0,
+        "stages": stages,
+    }
+
+
+def print_summary(summary):
+    """Print batch statistics in the CLI's plain text style"""
+    print(f"\n{'='*50}")
+    print("BATCH SUMMARY")
+    print(f"{'='*50}")
+    print(f"Completed: {summary['completed']}  Failed: {summary['failed']}")
+    print(f"Elapsed: {summary['elapsed_seconds']:.1f}s  "
+          f"Throughput: {summary['throughput_per_minute']:.1f} records/min")
+    print("\nPer-stage latency (seconds):")
+    print(f"{'stage':<16}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}")
+    for stage, stats in summary["stages"].items():
+        print(f"{stage:<16}{stats['count']:>7}{stats['mean']:>9.2f}{stats['p50']:>9.2f}"
+              f"{stats['p95']:>9.2f}{stats['max']:>9.2f}")
+
+
+def run_batch(crew, input_path, output_path, concurrency=4, rate_per_second=2.0,
+              checkpoint_path=None, retry_failed=False):
+    """Run every record in input_path through the crew and append results to output_path
+
+    Results are written as soon as each record finishes. Finished ids go to a
+    checkpoint file so an interrupted run can be resumed with the same command.
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    done = load_checkpoint(checkpoint_path, retry_failed)
+    limiter = RateLimiter(rate_per_second, burst=concurrency)
+    write_lock = threading.Lock()
+    timings = {stage: [] for stage in STAGES}
+    counts = {"completed": 0, "failed": 0, "skipped": 0}
+
+    def process(record_id, text):
+        limiter.acquire()
+        result = crew.process_symptoms(text, verbose=False)
+        status = "error" if "error" in result else "ok"
+        with write_lock:
+            with open(output_path, "a", encoding="utf-8") as out:
+                out.write(json.dumps({"id": record_id, "status": status, **result}) + "\n")
+            with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+                checkpoint.write(f"{record_id}\t{status}\n")
+            for stage, seconds in result.get("timings", {}).items():
+                timings.setdefault(stage, []).append(seconds)
+            counts["completed" if status == "ok" else "failed"] += 1
+            finished = counts["completed"] + counts["failed"]
+            print(f"[{finished}] {record_id}: {status}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        for record_id, text in read_records(input_path):
+            if record_id in done or not text.strip():
+                counts["skipped"] += 1
+                continue
+            # Keep a bounded number of records in flight so huge inputs stream through
+            if len(pending) >= concurrency * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+            pending.add(executor.submit(process, record_id, text))
+        for future in pending:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    if counts["skipped"]:
+        print(f"Skipped {counts['skipped']} records (already checkpointed or empty)")
+    summary = summarize(timings, counts["completed"], counts["failed"], elapsed)
+    print_summary(summary)
+    return summary
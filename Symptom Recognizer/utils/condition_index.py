@@ -0,0 +1,356 @@
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import struct
+import tempfile
+from utils.symptom_cache import normalize_text, parse_structured
+
+DEFAULT_DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "symptom_conditions.json")
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "condition_index.bin")
+
+INDEX_MAGIC = b"SYMIDX01"
+_HEADER_LENGTH = struct.Struct("<Q")
+
+# Body areas count for less than symptoms when ranking
+SYMPTOM_WEIGHT = 1.0
+BODY_AREA_WEIGHT = 0.4
+
+# Thresholds for answering without the LLM
+MIN_CONFIDENCE = 0.6
+MAX_LOCAL_SEVERITY = 6
+# Symptoms lasting longer than this (or of unknown duration) always go to the model
+MAX_LOCAL_DURATION_DAYS = 14
+SHORTLIST_SIZE = 5
+
+# Words ignored when splitting symptom phrases into single-word terms
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "at", "to", "with", "my", "i", "is",
+    "feeling", "feel", "some", "very", "mild", "after", "around", "if", "when", "for",
+}
+
+# Phrases that always need a clinician's judgement, never a local shortcut
+RED_FLAGS = [
+    "chest pain", "shortness of breath", "fainting", "confusion", "slurred speech",
+    "sudden weakness", "sudden severe headache", "coughing blood", "blood in stool",
+    "vomiting blood", "seizure", "suicidal", "numbness on one side",
+]
+
+# Keys in structured symptom JSON that hold symptom phrases or body areas
+_SYMPTOM_KEYS = ["main_symptoms", "associated_symptoms", "symptoms", "main_symptom"]
+_AREA_KEYS = ["body_parts", "affected_areas", "body_areas", "location"]
+
+_DURATION_UNITS = {"minute": 1 / 1440, "hour": 1 / 24, "day": 1, "night": 1, "week": 7, "month": 30, "year": 365}
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "couple": 2, "few": 3, "several": 4,
+}
+_DURATION_PATTERN = re.compile(
+    r"\b(\d+(?:\.\d+)?|" + "|".join(_NUMBER_WORDS) + r")(?:\s+of)?\s*"
+    r"(minute|hour|day|night|week|month|year)s?\b"
+)
+
+
+def _terms(phrase):
+    """Return the normalized phrase plus its content words"""
+    phrase = normalize_text(phrase)
+    if not phrase:
+        return []
+    words = [word for word in re.findall(r"[a-z0-9']+", phrase) if word not in STOPWORDS]
+    return [phrase] + [word for word in words if word != phrase]
+
+
+def parse_duration_days(text):
+    """Longest duration mentioned in text, in days ("1-3 days" -> 3), or None if there isn't one"""
+    text = normalize_text(text)
+    if not text:
+        return None
+    if re.search(r"\b(?:today|this morning|tonight|yesterday|last night)\b", text):
+        return 1.0
+    # "1-3 days": the upper bound counts
+    text = re.sub(r"(\d+)\s*(?:-|to)\s*(\d+)", r"\2", text)
+    durations = [
+        (int(number) if number.isdigit() else float(number) if number[0].isdigit() else _NUMBER_WORDS[number])
+        * _DURATION_UNITS[unit]
+        for number, unit in _DURATION_PATTERN.findall(text)
+    ]
+    if not durations:
+        return None
+    days = max(durations)
+    # "More than 2 weeks" is longer than the bound it names
+    if re.search(r"\b(?:more than|over|longer than|at least)\b", text):
+        days += 1
+    return days
+
+
+def _flatten_text(value):
+    """Every string in a structured value, joined, for red flag scanning"""
+    if isinstance(value, dict):
+        return " ".join(_flatten_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_flatten_text(item) for item in value)
+    return str(value) if value is not None else ""
+
+
+def build_index(dataset_path=DEFAULT_DATASET_PATH, index_path=DEFAULT_INDEX_PATH):
+    """Build the binary inverted index from the bundled dataset
+
+    Layout: magic, header length, JSON header (conditions and a term table of
+    posting offsets), then the postings section that is read through mmap.
+    """
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    conditions = dataset["conditions"]
+
+    # Collect per-condition term weights (phrase terms weigh more than single words)
+    condition_terms = []
+    for condition in conditions:
+        weights = {}
+        for field, field_weight in (("symptoms", SYMPTOM_WEIGHT), ("body_areas", BODY_AREA_WEIGHT)):
+            for phrase in condition.get(field, []):
+                for position, term in enumerate(_terms(phrase)):
+                    weight = field_weight if position == 0 else field_weight * 0.5
+                    weights[term] = max(weights.get(term, 0.0), weight)
+        condition_terms.append(weights)
+
+    # Weight terms by inverse document frequency
+    document_frequency = {}
+    for weights in condition_terms:
+        for term in weights:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    total = len(conditions)
+
+    postings = {}
+    for condition_id, weights in enumerate(condition_terms):
+        for term, weight in weights.items():
+            idf = math.log(1 + total / document_frequency[term])
+            postings.setdefault(term, []).append((condition_id, round(weight * idf, 4)))
+
+    body = bytearray()
+    term_table = {}
+    for term in sorted(postings):
+        encoded = ",".join(f"{condition_id}:{weight}" for condition_id, weight in postings[term]).encode("ascii")
+        term_table[term] = [len(body), len(encoded)]
+        body.extend(encoded)
+
+    header = json.dumps({
+        "version": dataset.get("version", 1),
+        "conditions": [
+            {
+                "name": condition["name"],
+                "suggested_tests": condition.get("suggested_tests", []),
+                "doctor_specialties": condition.get("doctor_specialties", []),
+                "urgency_level": condition.get("urgency_level", "medium"),
+                "total_weight": round(sum(
+                    weight * math.log(1 + total / document_frequency[term])
+                    for term, weight in condition_terms[condition_id].items()
+                ), 4),
+            }
+            for condition_id, condition in enumerate(conditions)
+        ],
+        "terms": term_table,
+    }, separators=(",", ":")).encode("utf-8")
+
+    # A unique temp file per writer, so processes rebuilding at the same time
+    # don't write into each other's file; os.replace makes the swap atomic
+    directory = os.path.dirname(os.path.abspath(index_path))
+    descriptor, temp_path = tempfile.mkstemp(prefix=".condition_index.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(body)
+        os.replace(temp_path, index_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return index_path
+
+
+class ConditionMatch:
+    """Ranked candidates for one set of structured symptoms"""
+
+    def __init__(self, candidates, query_phrases, confidence, red_flags, severity, duration_days=None):
+        self.candidates = candidates
+        self.query_phrases = query_phrases
+        self.confidence = confidence
+        self.red_flags = red_flags
+        self.severity = severity
+        self.duration_days = duration_days
+
+    @property
+    def top(self):
+        return self.candidates[0] if self.candidates else None
+
+    def can_answer_locally(self):
+        """True for short, low-urgency cases with a confident match and no red flags"""
+        if not self.top or self.red_flags:
+            return False
+        if self.severity is not None and self.severity > MAX_LOCAL_SEVERITY:
+            return False
+        if self.duration_days is None or self.duration_days > MAX_LOCAL_DURATION_DAYS:
+            return False
+        return self.top["urgency_level"] == "low" and self.confidence >= MIN_CONFIDENCE
+
+    def shortlist(self, size=SHORTLIST_SIZE):
+        """Compact grounded shortlist to include in the mapper prompt"""
+        return [
+            {
+                "condition": candidate["name"],
+                "score": round(candidate["score"], 2),
+                "suggested_tests": candidate["suggested_tests"],
+                "doctor_specialties": candidate["doctor_specialties"],
+                "urgency_level": candidate["urgency_level"],
+            }
+            for candidate in self.candidates[:size]
+        ]
+
+    def to_mapped_conditions(self):
+        """Answer in the ConditionMapperAgent output schema"""
+        leaders = [
+            candidate for candidate in self.candidates[:3]
+            if candidate["score"] >= self.top["score"] * 0.5 and candidate["urgency_level"] == "low"
+        ]
+        tests, specialties = [], []
+        for candidate in leaders:
+            tests.extend(test for test in candidate["suggested_tests"] if test not in tests)
+            specialties.extend(item for item in candidate["doctor_specialties"] if item not in specialties)
+        return json.dumps({
+            "probable_conditions": [candidate["name"] for candidate in leaders],
+            "suggested_tests": tests,
+            "doctor_specialties": specialties,
+            "urgency_level": "low",
+            "source": "Local symptom reference (no AI call needed)",
+            "disclaimer": "These are areas to discuss with a doctor, not a diagnosis.",
+        })
+
+
+class ConditionIndex:
+    """Read-only, memory-mapped inverted index of symptoms and body areas to conditions"""
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self._file = open(index_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"Not a condition index file: {index_path}")
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, len(INDEX_MAGIC))
+        header_start = len(INDEX_MAGIC) + _HEADER_LENGTH.size
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+        self._postings_start = header_start + header_length
+        self.conditions = header["conditions"]
+        self._terms = header["terms"]
+
+    @classmethod
+    def load(cls, dataset_path=DEFAULT_DATASET_PATH, index_path=DEFAULT_INDEX_PATH):
+        """Open the index, rebuilding it first if it is missing or older than the dataset"""
+        if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(dataset_path):
+            build_index(dataset_path, index_path)
+        return cls(index_path)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def postings(self, term):
+        """Return [(condition_id, weight), ...] for a normalized term"""
+        entry = self._terms.get(term)
+        if entry is None:
+            return []
+        offset, length = entry
+        start = self._postings_start + offset
+        raw = self._mmap[start:start + length].decode("ascii")
+        return [(int(condition_id), float(weight)) for condition_id, weight in
+                (item.split(":") for item in raw.split(","))]
+
+    def match(self, symptoms, areas=(), severity=None, duration_days=None, context=""):
+        """Rank conditions for symptom phrases and body areas
+
+        `context` is any other text about the case (triggers, timing, free
+        text); it doesn't affect ranking but is scanned for red flags.
+        """
+        query_phrases = [normalize_text(phrase) for phrase in symptoms if str(phrase).strip()]
+        scores = {}
+        phrase_hits = {}
+        for query_index, phrase in enumerate(query_phrases):
+            for term in _terms(phrase):
+                for condition_id, weight in self.postings(term):
+                    scores[condition_id] = scores.get(condition_id, 0.0) + weight
+                    phrase_hits.setdefault(condition_id, set()).add(query_index)
+        for area in areas:
+            for term in _terms(area)[:1]:
+                for condition_id, weight in self.postings(term):
+                    if condition_id in scores:
+                        scores[condition_id] += weight
+
+        candidates = []
+        for condition_id, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            candidate = dict(self.conditions[condition_id])
+            candidate["score"] = score
+            candidate["coverage"] = len(phrase_hits.get(condition_id, ())) / max(len(query_phrases), 1)
+            candidates.append(candidate)
+
+        confidence = 0.0
+        if candidates:
+            top = candidates[0]
+            runner_up = candidates[1]["score"] if len(candidates) > 1 else 0.0
+            margin = (top["score"] - runner_up) / top["score"] if top["score"] else 0.0
+            profile_fit = min(1.0, top["score"] / (top["total_weight"] * 0.5)) if top["total_weight"] else 0.0
+            confidence = top["coverage"] * (0.5 + 0.5 * margin) * (0.5 + 0.5 * profile_fit)
+
+        searchable = " ".join(query_phrases + [normalize_text(context)])
+        red_flags = [flag for flag in RED_FLAGS if flag in searchable]
+        return ConditionMatch(candidates, query_phrases, confidence, red_flags, severity, duration_days)
+
+    def match_structured(self, structured_symptoms):
+        """Rank conditions for interpreter-schema JSON; returns None if it can't be parsed"""
+        structured = parse_structured(structured_symptoms)
+        if structured is None:
+            return None
+        symptoms = []
+        for key in _SYMPTOM_KEYS:
+            value = structured.get(key)
+            symptoms.extend(value if isinstance(value, list) else [value] if value else [])
+        areas = []
+        for key in _AREA_KEYS:
+            value = structured.get(key)
+            areas.extend(value if isinstance(value, list) else [value] if value else [])
+        severity = None
+        found = re.search(r"\d+", str(structured.get("severity", "")))
+        if found:
+            severity = int(found.group())
+        return self.match(
+            [str(symptom) for symptom in symptoms], [str(area) for area in areas], severity,
+            duration_days=parse_duration_days(structured.get("duration", "")),
+            context=_flatten_text(structured),
+        )
+
+
+def map_conditions_grounded(condition_mapper, structured_symptoms, index):
+    """Map conditions using the local index to ground or skip the LLM call
+
+    Confident low-urgency matches are answered locally. Otherwise the mapper
+    receives the structured symptoms plus a ranked reference shortlist.
+    """
+    match = index.match_structured(structured_symptoms) if index is not None else None
+    if match is None or not match.candidates:
+        return condition_mapper.map_conditions(structured_symptoms)
+    if match.can_answer_locally():
+        return match.to_mapped_conditions()
+
+    grounded = dict(parse_structured(structured_symptoms))
+    grounded["reference_shortlist"] = match.shortlist()
+    return condition_mapper.map_conditions(json.dumps(grounded))
+
+
+if __name__ == "__main__":
+    # Offline build: python -m utils.condition_index build [dataset] [index]
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python -m utils.condition_index build [dataset_path] [index_path]")
+        sys.exit(1)
+    path = build_index(*sys.argv[2:4])
+    print(f"Condition index written to {path}")
@@ -0,0 +1,326 @@
+# Small DAG execution engine for agent pipelines. The same file is kept in
+# LegalEagle and Symptom Recognizer (each app is deployed on its own); a test
+# in each app's tests/ fails when the copies drift.
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class StageTimeout(Exception):
+    """Raised when a stage attempt runs longer than its timeout"""
+
+
+class StageTypeError(TypeError):
+    """Raised when a stage receives or returns a value of the wrong type"""
+
+
+class PipelineError(ValueError):
+    """Raised for an invalid pipeline definition (unknown inputs, cycles, duplicate outputs)"""
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline
+
+    `inputs` maps argument names to expected types; each name is either a
+    pipeline input or another stage's output. `func` is called with those
+    names as keyword arguments and its return value is published as
+    `output` (the stage name by default).
+    """
+    name: str
+    func: object
+    inputs: dict = field(default_factory=dict)
+    output: str = None
+    output_type: object = object
+    timeout: float = None
+    retries: int = 0
+    retry_delay: float = 1.0
+    # cache_key(**inputs) returns a key string, or None to skip the cache for this call
+    cache_key: object = None
+    cache_namespace: str = None
+    # fallback(error, **inputs) returns a value used when every attempt failed
+    fallback: object = None
+    # run_if(**inputs) returning False skips the stage and publishes skip_value
+    run_if: object = None
+    skip_value: object = None
+
+    def __post_init__(self):
+        self.output = self.output or self.name
+        self.cache_namespace = self.cache_namespace or self.name
+
+
+@dataclass
+class StageReport:
+    status: str = "pending"
+    seconds: float = 0.0
+    attempts: int = 0
+    cached: bool = False
+    error: str = None
+
+
+@dataclass
+class PipelineResult:
+    values: dict
+    stages: dict
+    total_seconds: float
+    # Threads of timed-out stage attempts; they may still be calling the LLM
+    abandoned: list = field(default_factory=list)
+
+    @property
+    def abandoned_calls(self):
+        """Timed-out stage calls that are still running"""
+        return [thread for thread in self.abandoned if thread.is_alive()]
+
+    @property
+    def timings(self):
+        """Seconds per stage plus "total", in the order stages finished"""
+        timings = {name: report.seconds for name, report in self.stages.items() if report.status != "pending"}
+        timings["total"] = self.total_seconds
+        return timings
+
+    @property
+    def error(self):
+        """Message of the first failed stage, or None when every stage produced a value"""
+        for name, report in self.stages.items():
+            if report.status == "failed":
+                return f"{name}: {report.error}"
+        return None
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+
+class MemoryCache:
+    """Thread-safe in-process TTL + LRU cache with the get_or_compute interface stages expect"""
+
+    def __init__(self, max_entries=256, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or time.time() - entry[1] > self.ttl_seconds:
+                self._entries.pop((namespace, key), None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[0]
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            self._entries[(namespace, key)] = (value, time.time())
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, namespace, key, compute):
+        cached = self.get(namespace, key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.set(namespace, key, value)
+        return value
+
+
+def text_key(*values):
+    """Cache key for one or more text values"""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(str(value).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _check_type(stage, name, value, expected):
+    if expected is not object and not isinstance(value, expected):
+        raise StageTypeError(
+            f"Stage '{stage}' expected {name} to be {getattr(expected, '__name__', expected)}, "
+            f"got {type(value).__name__}"
+        )
+
+
+def _call_with_timeout(func, kwargs, timeout, abandoned=None):
+    """Run func in a helper thread and stop waiting after timeout seconds
+
+    Python threads can't be killed, so a timed-out call keeps running in the
+    background; its result is discarded and its thread is appended to
+    `abandoned` so callers can tell when it really ends.
+    """
+    if not timeout:
+        return func(**kwargs)
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = func(**kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        if abandoned is not None:
+            abandoned.append(thread)
+        raise StageTimeout(f"timed out after {timeout:g}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+class Pipeline:
+    """A DAG of stages; independent stages run concurrently on a thread pool"""
+
+    def __init__(self, stages, cache=None, max_workers=4, log=None):
+        self.stages = list(stages)
+        self.cache = cache
+        self.max_workers = max_workers
+        self.log = log or (lambda *args, **kwargs: None)
+
+        producers = {}
+        for stage in self.stages:
+            if stage.output in producers:
+                raise PipelineError(f"Output '{stage.output}' is produced by both "
+                                    f"'{producers[stage.output].name}' and '{stage.name}'")
+            producers[stage.output] = stage
+        self.dependencies = {
+            stage.name: {producers[name].name for name in stage.inputs if name in producers}
+            for stage in self.stages
+        }
+        self.inputs = {name for stage in self.stages for name in stage.inputs if name not in producers}
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise PipelineError(f"Pipeline has a dependency cycle between: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def _run_stage(self, stage, kwargs, report, abandoned):
+        """Run one stage with caching, retries, timeout and fallback; returns its output value"""
+        started = time.perf_counter()
+        try:
+            for name, expected in stage.inputs.items():
+                _check_type(stage.name, name, kwargs[name], expected)
+            if stage.run_if is not None and not stage.run_if(**kwargs):
+                report.status = "skipped"
+                return stage.skip_value
+
+            def attempt():
+                last_error = None
+                for attempt_number in range(stage.retries + 1):
+                    report.attempts += 1
+                    try:
+                        value = _call_with_timeout(stage.func, kwargs, stage.timeout, abandoned)
+                        _check_type(stage.name, stage.output, value, stage.output_type)
+                        return value
+                    except (StageTypeError, StageTimeout) as e:
+                        # The timed-out call is still running in the background, so
+                        # retrying would stack another concurrent call on the LLM
+                        if isinstance(e, StageTimeout):
+                            self.log(f"Stage '{stage.name}' attempt {attempt_number + 1} {e}; not retrying")
+                        raise
+                    except Exception as e:
+                        last_error = e
+                        self.log(f"Stage '{stage.name}' attempt {attempt_number + 1} failed: {e}")
+                        if attempt_number < stage.retries:
+                            time.sleep(stage.retry_delay * (2 ** attempt_number))
+                raise last_error
+
+            key = stage.cache_key(**kwargs) if (self.cache is not None and stage.cache_key) else None
+            if key is None:
+                value = attempt()
+            else:
+                report.cached = True
+
+                def compute():
+                    report.cached = False
+                    return attempt()
+
+                value = self.cache.get_or_compute(stage.cache_namespace, key, compute)
+            report.status = "ok"
+            return value
+        except Exception as e:
+            report.error = str(e) or type(e).__name__
+            if stage.fallback is not None:
+                report.status = "fallback"
+                return stage.fallback(e, **kwargs)
+            report.status = "failed"
+            raise
+        finally:
+            report.seconds = time.perf_counter() - started
+
+    def run(self, **inputs):
+        """Run every stage once its inputs are available and return a PipelineResult
+
+        A stage that fails without a fallback marks its dependents as
+        skipped; the rest of the pipeline still runs.
+        """
+        missing = self.inputs - set(inputs)
+        if missing:
+            raise PipelineError(f"Missing pipeline inputs: {', '.join(sorted(missing))}")
+
+        started = time.perf_counter()
+        values = dict(inputs)
+        reports = OrderedDict((stage.name, StageReport()) for stage in self.stages)
+        by_name = {stage.name: stage for stage in self.stages}
+        waiting = {name: set(deps) for name, deps in self.dependencies.items()}
+        failed = set()
+        running = {}
+        abandoned = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while waiting or running:
+                for name in [name for name, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    stage = by_name[name]
+                    kwargs = {arg: values[arg] for arg in stage.inputs}
+                    running[executor.submit(self._run_stage, stage, kwargs, reports[name], abandoned)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        values[by_name[name].output] = future.result()
+                    except Exception:
+                        failed.add(name)
+                    reports.move_to_end(name)
+                    for other, deps in list(waiting.items()):
+                        # Skipped above via another failed dependency
+                        if other not in waiting:
+                            continue
+                        if name in deps:
+                            if name in failed:
+                                # Dependents of a failed stage can't run
+                                del waiting[other]
+                                failed.add(other)
+                                reports[other].status = "skipped"
+                                reports[other].error = f"'{name}' failed"
+                                self._skip_dependents(other, waiting, failed, reports)
+                            else:
+                                deps.discard(name)
+
+        return PipelineResult(values, dict(reports), time.perf_counter() - started, abandoned)
+
+    def _skip_dependents(self, name, waiting, failed, reports):
+        for other, deps in list(waiting.items()):
+            if other in waiting and name in deps:
+                del waiting[other]
+                failed.add(other)
+                reports[other].status = "skipped"
+                reports[other].error = f"'{name}' was skipped"
+                self._skip_dependents(other, waiting, failed, reports)
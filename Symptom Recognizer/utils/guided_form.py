@@ -0,0 +1,70 @@
+import re
+import json
+from utils.symptom_cache import parse_structured, symptom_fingerprint
+
+# Keys in the interpreter output that may hold symptom names
+_SYMPTOM_LIST_KEYS = ["main_symptoms", "associated_symptoms", "symptoms"]
+
+
+def _split_symptoms(text):
+    """Split a free-text list ("nausea, dizziness and fatigue") into items"""
+    parts = re.split(r",|;|\n|\band\b", text)
+    return [part.strip(" .-") for part in parts if part.strip(" .-")]
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    if isinstance(value, str) and value.strip():
+        return _split_symptoms(value)
+    return []
+
+
+def interpret_associated_symptoms(text, symptom_interpreter, cache=None):
+    """Extract symptom names from the free-text "Other symptoms" field via the interpreter"""
+    if cache is not None:
+        output = cache.get_or_compute(
+            "interpreter",
+            symptom_fingerprint(text),
+            lambda: symptom_interpreter.process_symptoms(text)
+        )
+    else:
+        output = symptom_interpreter.process_symptoms(text)
+
+    structured = parse_structured(output)
+    if structured is None:
+        return _split_symptoms(text)
+
+    symptoms = []
+    for key in _SYMPTOM_LIST_KEYS:
+        for symptom in _as_list(structured.get(key)):
+            if symptom.lower() not in [existing.lower() for existing in symptoms]:
+                symptoms.append(symptom)
+    return symptoms or _split_symptoms(text)
+
+
+def build_structured_symptoms(form_fields, symptom_interpreter=None, cache=None):
+    """Build interpreter-schema JSON directly from guided form fields
+
+    Only the free-text "Other symptoms" field goes through the LLM, and only
+    when it is filled in. Returns a JSON string, like the interpreter does.
+    """
+    associated_text = (form_fields.get("associated_symptoms") or "").strip()
+    associated_symptoms = []
+    if associated_text:
+        if symptom_interpreter is not None:
+            associated_symptoms = interpret_associated_symptoms(associated_text, symptom_interpreter, cache)
+        else:
+            associated_symptoms = _split_symptoms(associated_text)
+
+    main_symptom = (form_fields.get("main_symptom") or "").strip()
+    structured = {
+        "main_symptoms": [main_symptom] if main_symptom else [],
+        "duration": form_fields.get("duration") or "",
+        "severity": f"{form_fields['severity']}/10" if form_fields.get("severity") else "",
+        "body_parts": list(form_fields.get("affected_areas") or []),
+        "triggers": (form_fields.get("triggers") or "").strip(),
+        "timing": form_fields.get("timing") or "",
+        "associated_symptoms": associated_symptoms,
+    }
+    return json.dumps(structured)
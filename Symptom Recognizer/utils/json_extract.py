@@ -0,0 +1,110 @@
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _scan(text, start):
+    """Scan from an opening brace; return (end_index, open_stack, in_string, cut_points)
+
+    end_index is one past the matching closing brace, or None when the text
+    ends first (partial or streamed output). cut_points lists the commas
+    outside strings with the brackets open at that point.
+    """
+    stack = []
+    cut_points = []
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char == ",":
+            cut_points.append((index, list(stack)))
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            if not stack or _CLOSERS[stack[-1]] != char:
+                return index + 1, [], False, cut_points
+            stack.pop()
+            if not stack:
+                return index + 1, [], False, cut_points
+    return None, stack, in_string, cut_points
+
+
+def iter_json_objects(text):
+    """Yield every balanced, valid JSON object embedded in text, in order"""
+    position = 0
+    while True:
+        start = text.find("{", position)
+        if start == -1:
+            return
+        end, _, _, _ = _scan(text, start)
+        if end is None:
+            # A stray "{" in prose never closes; a real object may still follow it
+            position = start + 1
+            continue
+        try:
+            value = json.loads(text[start:end])
+        except ValueError:
+            position = start + 1
+            continue
+        if isinstance(value, dict):
+            yield value
+        position = end
+
+
+def _repair_partial(text, start):
+    """Close an unterminated object so a streamed prefix still parses
+
+    Tries the whole prefix first, then backs off to each earlier comma so a
+    half-written key or value is dropped rather than failing the parse.
+    """
+    _, stack, in_string, cut_points = _scan(text, start)
+    attempts = [(text[start:] + ('"' if in_string else ""), stack)]
+    attempts.extend((text[start:index], snapshot) for index, snapshot in reversed(cut_points))
+    for candidate, open_brackets in attempts:
+        closing = "".join(_CLOSERS[opener] for opener in reversed(open_brackets))
+        try:
+            value = json.loads(candidate.rstrip() + closing)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def extract_json(value, partial=True):
+    """Return the JSON object in an LLM response, or None if there isn't one
+
+    Handles markdown fences, prose around the object and, when partial is
+    True, output that was cut off mid-object. Dicts are returned unchanged.
+    When several objects are present the largest one wins.
+    """
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str):
+        return None
+
+    best = None
+    for candidate in iter_json_objects(value):
+        if best is None or len(json.dumps(candidate)) > len(json.dumps(best)):
+            best = candidate
+    if best is not None or not partial:
+        return best
+
+    # The truncated object may follow stray braces in prose, so try each start
+    start = value.find("{")
+    while start != -1:
+        repaired = _repair_partial(value, start)
+        if repaired is not None:
+            return repaired
+        start = value.find("{", start + 1)
+    return None
@@ -0,0 +1,133 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import httpx
+
+# live: plain pooled transport (this wrapper isn't installed); count: pass through and
+# count token usage (benchmarks); record: count and save fixtures; replay: serve fixtures only
+LLM_MODES = ["live", "count", "record", "replay"]
+DEFAULT_FIXTURE_DIR = os.path.join("fixtures", "llm")
+
+# Volatile values that would otherwise change the fixture key between runs: full
+# timestamps (with seconds) and UUIDs. Plain dates and clock times ("since 3:00")
+# are part of what the user said, so they stay in the key.
+_VOLATILE_PATTERNS = [
+    re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?"),
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),
+]
+
+# Response headers worth keeping in a fixture
+_KEPT_HEADERS = ["content-type", "retry-after", "x-ratelimit-remaining-requests", "x-ratelimit-remaining-tokens"]
+
+
+class FixtureMissingError(RuntimeError):
+    """Raised in replay mode when no fixture matches a request"""
+
+
+def fixture_key(method, path, body):
+    """Stable key for an LLM request: method, path and the JSON body without volatile values"""
+    try:
+        canonical = json.dumps(json.loads(body or b"{}"), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        canonical = (body or b"").decode("utf-8", "replace")
+    for pattern in _VOLATILE_PATTERNS:
+        canonical = pattern.sub("<volatile>", canonical)
+    return hashlib.sha256(f"{method} {path}\n{canonical}".encode("utf-8")).hexdigest()[:32]
+
+
+class LLMFixtureTransport(httpx.BaseTransport):
+    """httpx transport that records or replays LLM HTTP exchanges and counts token usage
+
+    Wraps the real transport of the shared Groq client, so every agent using
+    the shared transport is recorded and replayed without code changes. It
+    buffers response bodies, so it is only installed outside live mode;
+    streamed (server-sent event) responses pass through uncounted in count mode.
+    """
+
+    def __init__(self, wrapped, mode="count", fixture_dir=DEFAULT_FIXTURE_DIR):
+        if mode not in LLM_MODES:
+            raise ValueError(f"Unknown LLM mode '{mode}', expected one of {LLM_MODES}")
+        self.wrapped = wrapped
+        self.mode = mode
+        self.fixture_dir = fixture_dir
+        self._lock = threading.Lock()
+        self.usage = {"requests": 0, "replayed": 0, "recorded": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        if mode == "record":
+            os.makedirs(fixture_dir, exist_ok=True)
+
+    def _fixture_path(self, request):
+        body = request.read()
+        return os.path.join(self.fixture_dir, fixture_key(request.method, request.url.path, body) + ".json")
+
+    def _count_usage(self, status_code, content, replayed=False):
+        usage = {}
+        if status_code == 200:
+            try:
+                usage = json.loads(content).get("usage") or {}
+            except (ValueError, AttributeError):
+                usage = {}
+        with self._lock:
+            self.usage["requests"] += 1
+            if replayed:
+                self.usage["replayed"] += 1
+            elif self.mode == "record":
+                self.usage["recorded"] += 1
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                self.usage[field] += int(usage.get(field) or 0)
+
+    def handle_request(self, request):
+        path = self._fixture_path(request) if self.mode in ("record", "replay") else None
+
+        if self.mode == "replay":
+            if not os.path.exists(path):
+                raise FixtureMissingError(
+                    f"No LLM fixture for {request.method} {request.url.path} ({os.path.basename(path)}); "
+                    "record one with SYMPTOM_LLM_MODE=record"
+                )
+            with open(path, "r", encoding="utf-8") as f:
+                fixture = json.load(f)
+            content = fixture["response"]["body"].encode("utf-8")
+            self._count_usage(fixture["response"]["status_code"], content, replayed=True)
+            return httpx.Response(
+                fixture["response"]["status_code"],
+                headers=fixture["response"]["headers"],
+                content=content,
+                request=request,
+            )
+
+        response = self.wrapped.handle_request(request)
+        if self.mode != "record" and "text/event-stream" in response.headers.get("content-type", ""):
+            return response
+        content = response.read()
+        self._count_usage(response.status_code, content)
+
+        # Only successful exchanges are worth replaying
+        if self.mode == "record" and response.status_code == 200:
+            fixture = {
+                "request": {"method": request.method, "path": request.url.path,
+                            "body": json.loads(request.read() or b"{}")},
+                "response": {
+                    "status_code": response.status_code,
+                    "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+                    "body": content.decode("utf-8"),
+                },
+            }
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(fixture, f, indent=2)
+
+        # The body is already decoded, so drop headers describing the wire encoding
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def close(self):
+        self.wrapped.close()
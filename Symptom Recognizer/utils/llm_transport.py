@@ -0,0 +1,133 @@
+import os
+import threading
+import importlib.util
+
+# Connection pool and retry settings (overridable through environment variables)
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 120.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_TIMEOUT = 60.0
+
+# Langfuse batches events and exports them from its background thread
+LANGFUSE_FLUSH_AT = 50
+LANGFUSE_FLUSH_INTERVAL = 5.0
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+class LLMTransport:
+    """Process-wide Groq and Langfuse clients shared by all agents
+
+    One keep-alive connection pool (HTTP/2 when the h2 package is installed)
+    carries every Groq request, retries with backoff are configured once on
+    the shared client, and a single Langfuse client batches trace exports.
+    """
+
+    def __init__(self, groq_api_key, langfuse_secret_key, langfuse_public_key):
+        # Imported here so importing this module stays cheap at startup
+        import httpx
+        from groq import Groq
+        from langfuse import Langfuse
+        from utils.llm_replay import LLMFixtureTransport, DEFAULT_FIXTURE_DIR
+
+        self.http2 = importlib.util.find_spec("h2") is not None
+        limits = httpx.Limits(
+            max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            max_keepalive_connections=int(os.environ.get("LLM_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+            keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+        )
+
+        # Outside live mode requests go through the fixture transport so LLM
+        # calls can be recorded/replayed (SYMPTOM_LLM_MODE) and token usage is
+        # counted. It buffers responses, so live traffic uses the pool directly.
+        self.mode = os.environ.get("SYMPTOM_LLM_MODE", "live")
+        transport = httpx.HTTPTransport(http2=self.http2, limits=limits)
+        self.fixtures = None
+        if self.mode != "live":
+            transport = self.fixtures = LLMFixtureTransport(
+                transport,
+                mode=self.mode,
+                fixture_dir=os.environ.get("SYMPTOM_LLM_FIXTURES", DEFAULT_FIXTURE_DIR),
+            )
+        self.http_client = httpx.Client(
+            transport=transport,
+            timeout=httpx.Timeout(float(os.environ.get("LLM_TIMEOUT", DEFAULT_TIMEOUT)), connect=10.0),
+        )
+        self.groq = Groq(
+            api_key=groq_api_key,
+            http_client=self.http_client,
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+        )
+        self.langfuse = Langfuse(
+            secret_key=langfuse_secret_key,
+            public_key=langfuse_public_key,
+            flush_at=LANGFUSE_FLUSH_AT,
+            flush_interval=LANGFUSE_FLUSH_INTERVAL,
+        )
+        # Agent class name -> attributes switched to the shared clients
+        self.attached = {}
+
+    def attach(self, agent):
+        """Point an agent's Groq and Langfuse clients at the shared ones
+
+        Only attributes holding a groq.Groq or langfuse.Langfuse client are
+        swapped. The replaced clients are left alone rather than closed: the
+        agent created them, and Langfuse clients share one exporter per
+        process, so shutting one down could stop the shared one. Agents that
+        call the LLM another way (e.g. through CrewAI's LLM wrapper) are not
+        pooled, and a warning says so.
+        """
+        from groq import Groq
+        from langfuse import Langfuse
+
+        attached = []
+        for name, value in list(vars(agent).items()):
+            if isinstance(value, Groq) and value is not self.groq:
+                setattr(agent, name, self.groq)
+                attached.append(name)
+            elif isinstance(value, Langfuse) and value is not self.langfuse:
+                setattr(agent, name, self.langfuse)
+                attached.append(name)
+        if not attached:
+            print(f"Warning: {type(agent).__name__} has no Groq or Langfuse client attributes; "
+                  "its LLM calls will not use the shared connection pool")
+        self.attached[type(agent).__name__] = attached
+        return agent
+
+    @property
+    def usage(self):
+        """Request and token counts seen by the shared transport (all zero in live mode)"""
+        if self.fixtures is None:
+            return {"requests": 0, "replayed": 0, "recorded": 0,
+                    "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        return dict(self.fixtures.usage)
+
+    def warm_up(self):
+        """Open a pooled connection to Groq in the background so the first stage isn't cold"""
+        if self.mode == "replay":
+            return
+
+        def _connect():
+            try:
+                self.groq.models.list()
+            except Exception as e:
+                print(f"LLM transport warm-up failed: {e}")
+
+        threading.Thread(target=_connect, name="llm-transport-warmup", daemon=True).start()
+
+    def close(self):
+        """Flush pending traces and close pooled connections"""
+        self.langfuse.flush()
+        self.http_client.close()
+
+
+def get_transport(groq_api_key, langfuse_secret_key, langfuse_public_key):
+    """Return the process-wide transport, creating it on first use"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = LLMTransport(groq_api_key, langfuse_secret_key, langfuse_public_key)
+            _transport.warm_up()
+        return _transport
@@ -0,0 +1,74 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from utils.json_extract import extract_json
+
+
+@dataclass
+class AgentOutput:
+    """One agent's response: the raw text plus the JSON object found in it, if any"""
+    raw: Any
+    data: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def parse(cls, raw):
+        return cls(raw=raw, data=extract_json(raw))
+
+    @property
+    def display(self):
+        """The parsed object when there is one, otherwise the raw text"""
+        return self.data if self.data is not None else self.raw
+
+
+@dataclass
+class AnalysisResult:
+    """Parsed pipeline output, built once when a result arrives and reused on every rerun"""
+    symptoms: AgentOutput
+    conditions: AgentOutput
+    note: AgentOutput
+    timings: Dict[str, float] = field(default_factory=dict)
+    _summary_text: Optional[str] = field(default=None, repr=False)
+
+    @classmethod
+    def from_results(cls, results):
+        """Parse the three agent outputs of a process_symptoms() result"""
+        return cls(
+            symptoms=AgentOutput.parse(results["structured_symptoms"]),
+            conditions=AgentOutput.parse(results["mapped_conditions"]),
+            note=AgentOutput.parse(results["doctor_note"]),
+            timings=results.get("timings", {}),
+        )
+
+    @property
+    def readable_note(self):
+        """The doctor note's readable text, or None if the agent didn't return one"""
+        if self.note.data and "readable_format" in self.note.data:
+            return self.note.data["readable_format"]
+        return None
+
+    @property
+    def preparation_date(self):
+        json_format = (self.note.data or {}).get("json_format", {})
+        return json_format.get("preparation_date", "N/A") if isinstance(json_format, dict) else "N/A"
+
+    @property
+    def summary_text(self):
+        """Plain-text visit summary for download (rendered once, then memoized)"""
+        if self._summary_text is None and self.readable_note is not None:
+            symptoms = self.symptoms.display
+            conditions = self.conditions.display
+            self._summary_text = f"""
+SYMPTOM CHECKER & DOCTOR PREP BOT - VISIT SUMMARY
+Generated on: {self.preparation_date}
+
+{self.readable_note}
+
+STRUCTURED SYMPTOMS:
+{json.dumps(symptoms, indent=2) if isinstance(symptoms, dict) else symptoms}
+
+POTENTIAL AREAS OF CONCERN:
+{json.dumps(conditions, indent=2) if isinstance(conditions, dict) else conditions}
+
+DISCLAIMER: This is NOT a medical diagnosis. Always consult healthcare professionals.
+"""
+        return self._summary_text
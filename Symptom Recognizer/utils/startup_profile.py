@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Modules imported on the way to a ready app, cheapest first
+DEFAULT_TARGETS = [
+    "dotenv",
+    "utils.symptom_cache",
+    "utils.condition_index",
+    "streamlit",
+    "httpx",
+    "groq",
+    "langfuse",
+    "crewai",
+    "agents.symptom_interpreter",
+    "agents.condition_mapper",
+    "agents.doctor_note",
+]
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """Parse `python -X importtime` output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile_imports(targets):
+    """Import the targets in a fresh interpreter with -X importtime"""
+    code = "\n".join(
+        f"try:\n    import {target}\nexcept Exception:\n    pass" for target in targets
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    return parse_importtime(completed.stderr)
+
+
+def time_cold_import(target):
+    """Wall-clock seconds for a fresh interpreter to import one module (None if it fails)"""
+    code = f"import time; started = time.perf_counter(); import {target}; print(time.perf_counter() - started)"
+    completed = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def time_ready_steps():
+    """Time the in-process work needed before the first request can be served"""
+    sys.path.insert(0, APP_DIR)
+    steps = {}
+
+    started = time.perf_counter()
+    from utils.symptom_cache import SymptomCache
+    SymptomCache()
+    steps["open symptom cache"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    from utils.condition_index import ConditionIndex
+    ConditionIndex.load()
+    steps["load condition index"] = time.perf_counter() - started
+    return steps
+
+
+def build_report(targets=None, top=15):
+    """Collect import-time and cold-start measurements"""
+    targets = targets or DEFAULT_TARGETS
+    interpreter_started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], capture_output=True)
+    interpreter_seconds = time.perf_counter() - interpreter_started
+
+    rows = profile_imports(targets)
+    by_cumulative = sorted((row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True)
+    by_self = sorted(rows, key=lambda row: row[1], reverse=True)
+
+    return {
+        "python": sys.version.split()[0],
+        "interpreter_startup_seconds": interpreter_seconds,
+        "total_import_seconds": sum(row[2] for row in rows if row[3] == 0) / 1e6,
+        "top_cumulative": [
+            {"module": name, "cumulative_ms": cumulative / 1000, "self_ms": self_us / 1000}
+            for name, self_us, cumulative, _ in by_cumulative[:top]
+        ],
+        "top_self": [
+            {"module": name, "self_ms": self_us / 1000}
+            for name, self_us, _, _ in by_self[:top]
+        ],
+        "cold_imports": {target: time_cold_import(target) for target in targets},
+        "ready_steps": time_ready_steps(),
+    }
+
+
+def print_report(report):
+    """Print the report in the CLI's plain text style"""
+    print(f"\n{'='*50}")
+    print("STARTUP PROFILE")
+    print(f"{'='*50}")
+    print(f"Python {report['python']}: interpreter startup {report['interpreter_startup_seconds'] * 1000:.0f} ms, "
+          f"all imports {report['total_import_seconds'] * 1000:.0f} ms")
+
+    print("\nCold import per module (fresh interpreter):")
+    for target, seconds in report["cold_imports"].items():
+        shown = f"{seconds * 1000:9.1f} ms" if seconds is not None else "   not installed / failed"
+        print(f"  {target:<32}{shown}")
+
+    print("\nTop-level imports by cumulative time:")
+    for row in report["top_cumulative"]:
+        print(f"  {row['module']:<32}{row['cumulative_ms']:9.1f} ms")
+
+    print("\nModules by self time:")
+    for row in report["top_self"]:
+        print(f"  {row['module']:<48}{row['self_ms']:9.1f} ms")
+
+    print("\nIn-process steps before first request:")
+    for step, seconds in report["ready_steps"].items():
+        print(f"  {step:<32}{seconds * 1000:9.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main.py profile-startup",
+        description="Report which imports and startup steps dominate cold start"
+    )
+    parser.add_argument("modules", nargs="*", help="Modules to profile (default: the app's import chain)")
+    parser.add_argument("--top", type=int, default=15, help="Rows to show per table")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.modules or None, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from utils.json_extract import extract_json
+
+# Default cache settings (overridable through environment variables)
+DEFAULT_CACHE_PATH = os.path.join(".cache", "symptom_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 2000
+
+# Everyday wording folded onto one canonical term so equivalent cases share a key.
+# Only true equivalents belong here: folding clinically distinct complaints
+# (e.g. chest tightness vs chest pain) would serve one case the other's result.
+SYNONYMS = {
+    "head ache": "headache",
+    "head pain": "headache",
+    "migraine headache": "migraine",
+    "tummy ache": "abdominal pain",
+    "tummy pain": "abdominal pain",
+    "stomach ache": "abdominal pain",
+    "stomachache": "abdominal pain",
+    "stomach pain": "abdominal pain",
+    "belly pain": "abdominal pain",
+    "stomach": "abdomen",
+    "tummy": "abdomen",
+    "belly": "abdomen",
+    "feeling sick": "nausea",
+    "nauseous": "nausea",
+    "nauseated": "nausea",
+    "throwing up": "vomiting",
+    "puking": "vomiting",
+    "sore throat": "throat pain",
+    "runny nose": "nasal discharge",
+    "stuffy nose": "nasal congestion",
+    "blocked nose": "nasal congestion",
+    "short of breath": "shortness of breath",
+    "breathlessness": "shortness of breath",
+    "trouble breathing": "shortness of breath",
+    "feverish": "fever",
+    "high temperature": "fever",
+    "tired": "fatigue",
+    "tiredness": "fatigue",
+    "exhausted": "fatigue",
+    "exhaustion": "fatigue",
+    "dizzy": "dizziness",
+    "lightheaded": "dizziness",
+    "light headed": "dizziness",
+    "back ache": "back pain",
+    "backache": "back pain",
+    "tight chest": "chest tightness",
+    "coughing": "cough",
+    "itchy": "itching",
+    "itchiness": "itching",
+    "can't sleep": "insomnia",
+    "cannot sleep": "insomnia",
+    "trouble sleeping": "insomnia",
+}
+
+_SYNONYM_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(term) for term in sorted(SYNONYMS, key=len, reverse=True)) + r")\b"
+)
+
+
+def normalize_text(text):
+    """Lowercase, collapse whitespace and fold synonyms in a piece of text"""
+    text = re.sub(r"\s+", " ", str(text).lower()).strip()
+    text = text.strip(" .,;:!")
+    return _SYNONYM_PATTERN.sub(lambda match: SYNONYMS[match.group(1)], text)
+
+
+def _normalize_value(value):
+    """Recursively normalize a structured symptom value"""
+    if isinstance(value, dict):
+        return {
+            normalize_text(key).replace(" ", "_"): _normalize_value(item)
+            for key, item in value.items()
+            if item not in (None, "", [], {})
+        }
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize_value(item) for item in value if item not in (None, "")]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    if isinstance(value, bool) or isinstance(value, (int, float)):
+        return value
+    text = normalize_text(value)
+    # Comma separated lists ("head, neck") are order-insensitive
+    if "," in text:
+        return sorted(part.strip() for part in text.split(",") if part.strip())
+    return text
+
+
+def is_error_output(value):
+    """True for empty agent output or an error message, which must not be cached"""
+    if value is None or value == "" or value == {}:
+        return True
+    if isinstance(value, dict):
+        return "error" in value
+    if isinstance(value, str):
+        structured = extract_json(value, partial=False)
+        if structured is not None:
+            return "error" in structured
+        return bool(re.match(r"\s*(?:❌\s*)?(?:error|exception|failed)\b", value, re.IGNORECASE))
+    return False
+
+
+def parse_structured(value):
+    """Return a dict for JSON agent output (fenced or embedded in prose), otherwise None"""
+    return extract_json(value, partial=False)
+
+
+def symptom_fingerprint(symptoms):
+    """Build a canonical fingerprint for structured symptoms or a free-text description
+
+    Accepts a dict of guided-form fields, JSON output from the interpreter, or
+    plain text. Equivalent inputs (case, whitespace, synonyms, area order)
+    produce the same fingerprint.
+    """
+    structured = parse_structured(symptoms)
+    if structured is not None:
+        canonical = json.dumps(_normalize_value(structured), sort_keys=True, separators=(",", ":"))
+    else:
+        canonical = normalize_text(symptoms)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SymptomCache:
+    """Persistent TTL + LRU cache for agent outputs, backed by SQLite"""
+
+    def __init__(self, path=None, ttl_seconds=None, max_entries=None):
+        self.path = path or os.environ.get("SYMPTOM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if ttl_seconds is None:
+            ttl_seconds = os.environ.get("SYMPTOM_CACHE_TTL", DEFAULT_TTL_SECONDS)
+        if max_entries is None:
+            max_entries = os.environ.get("SYMPTOM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                cost_seconds REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def _stat(self, namespace):
+        return self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "saved_seconds": 0.0})
+
+    def get(self, namespace, key):
+        """Return the cached value or None, refreshing its LRU position on a hit"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, cost_seconds FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            stats = self._stat(namespace)
+            if row is None:
+                stats["misses"] += 1
+                return None
+            value, created_at, cost_seconds = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._conn.commit()
+                stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+            self._conn.commit()
+            stats["hits"] += 1
+            stats["saved_seconds"] += cost_seconds
+            return json.loads(value)
+
+    def set(self, namespace, key, value, cost_seconds=0.0):
+        """Store a value and evict least recently used entries beyond max_entries
+
+        Error outputs are not stored, so a transient failure isn't served for the whole TTL.
+        """
+        if is_error_output(value):
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), now, now, cost_seconds),
+            )
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                """DELETE FROM entries WHERE rowid IN (
+                    SELECT rowid FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def get_or_compute(self, namespace, key, compute):
+        """Return the cached value for key, calling compute() and storing its result on a miss"""
+        cached = self.get(namespace, key)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        value = compute()
+        self.set(namespace, key, value, time.perf_counter() - started)
+        return value
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def metrics(self):
+        """Return hit ratio and latency saved, overall and per namespace"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            namespaces = {name: dict(stats) for name, stats in self._stats.items()}
+
+        for stats in namespaces.values():
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+
+        hits = sum(stats["hits"] for stats in namespaces.values())
+        misses = sum(stats["misses"] for stats in namespaces.values())
+        return {
+            "entries": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "saved_seconds": sum(stats["saved_seconds"] for stats in namespaces.values()),
+            "namespaces": namespaces,
+        }
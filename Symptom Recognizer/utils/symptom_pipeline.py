@@ -0,0 +1,62 @@
+import os
+from utils.dag import Stage, Pipeline
+from utils.symptom_cache import symptom_fingerprint
+from utils.guided_form import build_structured_symptoms
+from utils.condition_index import map_conditions_grounded
+
+DEFAULT_STAGE_TIMEOUT = 90.0
+DEFAULT_STAGE_RETRIES = 1
+
+
+def build_symptom_pipeline(symptom_interpreter, condition_mapper, doctor_note_agent,
+                           cache=None, condition_index=None, log=None):
+    """Declare the interpret -> map_conditions -> doctor_note pipeline
+
+    Pipeline inputs are `user_input` (free text) and `form_fields` (guided
+    form values or None). Stage names match the timing keys used by the
+    batch runner and the benchmark. Cache namespaces are the ones the
+    agents used before, so existing cache entries stay valid.
+    """
+    timeout = float(os.environ.get("SYMPTOM_STAGE_TIMEOUT", DEFAULT_STAGE_TIMEOUT))
+    retries = int(os.environ.get("SYMPTOM_STAGE_RETRIES", DEFAULT_STAGE_RETRIES))
+
+    def interpret(user_input, form_fields):
+        # Guided form input is already structured, so it skips the interpreter
+        # round-trip (except for free-text "Other symptoms")
+        if form_fields is not None:
+            return build_structured_symptoms(form_fields, symptom_interpreter, cache)
+        return symptom_interpreter.process_symptoms(user_input)
+
+    def map_conditions(structured_symptoms):
+        return map_conditions_grounded(condition_mapper, structured_symptoms, condition_index)
+
+    def doctor_note(structured_symptoms, mapped_conditions):
+        return doctor_note_agent.create_doctor_note(structured_symptoms, mapped_conditions)
+
+    stages = [
+        Stage(
+            "interpret", interpret,
+            inputs={"user_input": str, "form_fields": (dict, type(None))},
+            output="structured_symptoms",
+            timeout=timeout, retries=retries,
+            # The guided form caches its own interpreter call
+            cache_key=lambda user_input, form_fields: symptom_fingerprint(user_input) if form_fields is None else None,
+            cache_namespace="interpreter",
+        ),
+        Stage(
+            "map_conditions", map_conditions,
+            # Agent outputs are passed on as returned (usually JSON strings, but
+            # cached or guided-form values may be dicts), so they aren't type-checked
+            inputs={"structured_symptoms": object},
+            output="mapped_conditions",
+            timeout=timeout, retries=retries,
+            cache_key=lambda structured_symptoms: symptom_fingerprint(structured_symptoms),
+            cache_namespace="condition_mapper",
+        ),
+        Stage(
+            "doctor_note", doctor_note,
+            inputs={"structured_symptoms": object, "mapped_conditions": object},
+            timeout=timeout, retries=retries,
+        ),
+    ]
+    return Pipeline(stages, cache=cache, max_workers=2, log=log)